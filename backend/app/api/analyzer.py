@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException
 from app.core.models import AnalyzeRequest, AnalyzeResponse
 from app.detector import SitemapDetector
 from app.core.config import settings
+from app.core.http_client import http_client
 from urllib.parse import urlparse
 
 router = APIRouter()
@@ -28,8 +29,8 @@ async def analyze_url(request: AnalyzeRequest):
             timeout=settings.REQUEST_TIMEOUT
         )
         
-        # Detect crawl strategy
-        suggested_mode, sitemap_info = await detector.detect(url)
+        # Detect crawl strategy, counting the sitemap's URLs for the estimate
+        suggested_mode, sitemap_info = await detector.detect(url, count_urls=True)
         
         # Extract domain
         parsed = urlparse(url)
@@ -43,22 +44,22 @@ async def analyze_url(request: AnalyzeRequest):
         description = None
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    headers={"User-Agent": settings.USER_AGENT},
-                    timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
-                ) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        soup = BeautifulSoup(content, 'html.parser')
-                        
-                        if soup.title:
-                            title = soup.title.string
-                        
-                        meta_desc = soup.find('meta', attrs={'name': 'description'})
-                        if meta_desc:
-                            description = meta_desc.get('content', '')
+            session = http_client.session
+            async with session.get(
+                url,
+                headers={"User-Agent": settings.USER_AGENT},
+                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
+            ) as response:
+                if response.status == 200:
+                    content = await response.text()
+                    soup = BeautifulSoup(content, 'html.parser')
+
+                    if soup.title:
+                        title = soup.title.string
+
+                    meta_desc = soup.find('meta', attrs={'name': 'description'})
+                    if meta_desc:
+                        description = meta_desc.get('content', '')
         except Exception as e:
             print(f"Error fetching page metadata: {e}")
         
@@ -8,20 +8,121 @@ License: MIT
 from fastapi import APIRouter, HTTPException
 from app.core.models import (
     CrawlRequest, CrawlResponse, JobStatusResponse,
-    CrawlStatus, CrawlMode
+    CrawlStatus, CrawlMode, PageInfo, PdfEngine
 )
 from app.core.storage import job_storage
 from app.core.config import settings
 from app.crawler import SitemapCrawler, RecursiveCrawler, SinglePageCrawler
 from app.renderer import ContentRenderer
 from app.exporter import PDFExporter
+from app.exporter.page_store import PageStore
+from app.exporter.pdf_exporter import (
+    WEASYPRINT_AVAILABLE, WEASYPRINT_ERROR, export_pdf, weasyprint_pool
+)
 from app.exporter.playwright_pdf_exporter import PlaywrightPDFExporter
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
 import asyncio
 import os
+import re
+import time
 
 router = APIRouter()
 
 
+def _filename_base(title: Optional[str], url: str, job_id: str) -> str:
+    """Build a safe export file name (without extension) from a page title or URL"""
+    # Use the title, falling back to the URL's host
+    filename_base = title or url.split('//')[-1].split('/')[0]
+    
+    # Sanitize filename: remove invalid characters
+    filename_base = re.sub(r'[<>:"/\\|?*]', '', filename_base)
+    filename_base = filename_base.strip()
+    # Limit length
+    if len(filename_base) > 100:
+        filename_base = filename_base[:100]
+    # Fallback if empty
+    if not filename_base:
+        filename_base = f"document_{job_id[:8]}"
+    return filename_base
+
+
+def _pdf_engine(job_id: str, request: CrawlRequest) -> PdfEngine:
+    """PDF engine for a job: the request's choice, else the deployment default"""
+    engine = request.config.pdf_engine
+    if engine is None:
+        try:
+            engine = PdfEngine(settings.PDF_ENGINE)
+        except ValueError:
+            job_storage.add_log(job_id, f"⚠ Unknown PDF_ENGINE '{settings.PDF_ENGINE}', using Playwright")
+            engine = PdfEngine.PLAYWRIGHT
+    
+    if engine == PdfEngine.WEASYPRINT and not WEASYPRINT_AVAILABLE:
+        job_storage.add_log(job_id, f"⚠ WeasyPrint is not available ({WEASYPRINT_ERROR[:100]}), using Playwright")
+        engine = PdfEngine.PLAYWRIGHT
+    return engine
+
+
+async def _direct_print(job_id: str, request: CrawlRequest) -> bool:
+    """
+    Print a single-page job straight from the browser
+    
+    The page is loaded, cleaned up and printed in one browser page instead
+    of being fetched, rendered, rebuilt and printed again.
+    
+    Returns:
+        True if the job is complete, False if the full pipeline should run
+    """
+    from datetime import datetime
+    started = time.monotonic()
+    job_storage.update_job(
+        job_id,
+        status=CrawlStatus.GENERATING,
+        current_step="Printing page"
+    )
+    
+    filename_bases = []
+    
+    def filename_for(title: Optional[str]) -> str:
+        filename_bases.append(_filename_base(title, str(request.url), job_id))
+        return f"{filename_bases[-1]}.pdf"
+    
+    exporter = PlaywrightPDFExporter(settings.EXPORT_DIR, job_storage=job_storage, job_id=job_id)
+    try:
+        pdf_path, info = await exporter.export_direct(
+            str(request.url),
+            filename_for,
+            include_images=request.config.include_images
+        )
+    except Exception as e:
+        print(f"Direct print error: {e}")
+        job_storage.add_log(job_id, f"⚠ Direct print failed: {str(e)[:200]}. Using the full pipeline...")
+        job_storage.update_job(job_id, progress=0.0, pdf_bytes_written=0)
+        return False
+    
+    job_storage.add_page(job_id, PageInfo(
+        url=str(request.url),
+        title=info['title'],
+        size=info['size'],
+        has_images=info['has_images'],
+        word_count=info['word_count'],
+        status="success"
+    ))
+    job_storage.add_log(job_id, f"✓ PDF document ready for download! (printed directly in {time.monotonic() - started:.1f}s)")
+    job_storage.update_job(
+        job_id,
+        status=CrawlStatus.COMPLETED,
+        current_step="Complete",
+        progress=100.0,
+        pages_found=1,
+        pages_processed=1,
+        completed_at=datetime.now().isoformat(),
+        result_file=pdf_path,
+        result_filename=f"docforge-{filename_bases[-1]}.pdf"
+    )
+    return True
+
+
 async def process_crawl_job(job_id: str, request: CrawlRequest):
     """Background task to process crawl job"""
     # Fix Windows event loop policy for subprocess support
@@ -34,6 +135,8 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
     sys.stdout.flush()
     with open('crawl_debug.log', 'a', encoding='utf-8') as f:
         f.write(f"\n{'='*60}\n>>> TASK STARTED: Job {job_id}\n{'='*60}\n")
+    store = None
+    crawlers = []  # Crawlers whose kept static HTML is deleted at the end
     try:
         with open('crawl_debug.log', 'a', encoding='utf-8') as f:
             f.write(">>> Step 1: Updating status to ANALYZING\n")
@@ -69,11 +172,22 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
                 start_url = sitemap_info.url
             else:
                 crawler = RecursiveCrawler(request.config, settings.USER_AGENT)
+        crawlers.append(crawler)
+        
+        engine = _pdf_engine(job_id, request)
         
         # Log strategy
         strategy_name = request.mode.value if hasattr(request.mode, 'value') else str(request.mode)
         if request.mode == CrawlMode.SINGLE_PAGE:
             job_storage.add_log(job_id, f"Using {strategy_name} strategy - capturing this page only")
+            
+            # Load and print the page in one browser page when possible
+            if (
+                engine == PdfEngine.PLAYWRIGHT
+                and settings.DIRECT_PRINT_SINGLE_PAGE
+                and await _direct_print(job_id, request)
+            ):
+                return
         else:
             job_storage.add_log(job_id, f"Using {strategy_name} strategy")
         
@@ -103,7 +217,8 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
                 job_storage.update_job(
                     job_id,
                     progress=progress,
-                    pages_found=len(pages_data)
+                    pages_found=len(pages_data),
+                    http_cache=dict(crawler.cache_stats)
                 )
                 
                 # Stop if we hit max URLs
@@ -113,10 +228,26 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
             job_storage.add_log(job_id, f"⚠ Crawl error: {str(e)}. Found {len(pages_data)} pages so far.")
             print(f"Error during crawl: {e}")
         
+        for warning in crawler.warnings:
+            job_storage.add_log(job_id, f"⚠ {warning}")
+        
+        # Final counters, including fetches after the last page was yielded
+        job_storage.update_job(job_id, http_cache=dict(crawler.cache_stats))
+        if settings.HTTP_CACHE_ENABLED:
+            job_storage.add_log(
+                job_id,
+                f"HTTP cache: {crawler.cache_stats['hits']} hits, {crawler.cache_stats['misses']} misses"
+            )
+        
+        # Files holding the HTML of pages that render without JavaScript, keyed by page URL
+        static_pages = crawler.static_pages
+        
         # If no pages found, fall back to single page
         if not pages_data:
             job_storage.add_log(job_id, "No pages found. Trying single page mode...")
             single_crawler = SinglePageCrawler(request.config, settings.USER_AGENT)
+            crawlers.append(single_crawler)
+            static_pages = single_crawler.static_pages
             try:
                 async for page_info in single_crawler.crawl(str(request.url)):
                     job_storage.add_page(job_id, page_info)
@@ -135,11 +266,21 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
             current_step="Processing content"
         )
         job_storage.add_log(job_id, f"Processing {len(pages_data)} pages...")
+        static_count = sum(1 for page in pages_data if page.url in static_pages)
+        if static_count:
+            job_storage.add_log(
+                job_id,
+                f"{static_count} static pages rendered from fetched HTML, "
+                f"{len(pages_data) - static_count} need the browser"
+            )
         with open('crawl_debug.log', 'a', encoding='utf-8') as f:
             f.write(">>> Step 4: About to start rendering\n")
         
-        # Render pages with Playwright
+        # Render pages with Playwright. Each page is written to disk as soon as
+        # it is rendered; only its title, URL and metadata stay in memory
         rendered_pages = []
+        store = PageStore(settings.EXPORT_DIR, len(pages_data))
+        loop = asyncio.get_event_loop()
         try:
             with open('crawl_debug.log', 'a', encoding='utf-8') as f:
                 f.write(f"DEBUG: Creating ContentRenderer for job {job_id}\n")
@@ -147,32 +288,45 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
             print(f"[DEBUG] About to create ContentRenderer async context")
             job_storage.add_log(job_id, "[DEBUG] Creating ContentRenderer object...")
             try:
-                renderer_context = ContentRenderer()
+                renderer_context = ContentRenderer(image_profile=request.config.image_profile.value)
                 job_storage.add_log(job_id, "[DEBUG] ContentRenderer object created, entering context...")
                 async with renderer_context as renderer:
                     with open('crawl_debug.log', 'a', encoding='utf-8') as f:
                         f.write("ContentRenderer created successfully\n")
                     job_storage.add_log(job_id, "Renderer ready")
                     print(f"[DEBUG] ContentRenderer ready, processing {len(pages_data)} pages")
-                    for i, page in enumerate(pages_data):
-                        try:
+                    
+                    async def render_one(i, page):
+                        def started():
+                            # Logged once the page gets a render slot, not while it waits for one
                             job_storage.add_log(job_id, f"Rendering: {page.title or page.url}")
                             print(f"About to render page: {page.url}")
-                            rendered = await renderer.render_page(
-                                page.url,
-                                include_images=request.config.include_images
-                            )
+                        
+                        try:
+                            if page.url in static_pages:
+                                html_path, final_url = static_pages[page.url]
+                                rendered = await renderer.render_static(
+                                    page.url,
+                                    html_path,
+                                    include_images=request.config.include_images,
+                                    base_url=final_url,
+                                    on_start=started
+                                )
+                            else:
+                                rendered = await renderer.render_page(
+                                    page.url,
+                                    include_images=request.config.include_images,
+                                    on_start=started
+                                )
                             print(f"Page rendered successfully: {page.url}")
-                            rendered_pages.append(rendered)
-                            
-                            # Update progress (50-80%)
-                            progress = 50 + (i / len(pages_data)) * 30
-                            job_storage.update_job(
-                                job_id,
-                                progress=progress,
-                                pages_processed=i + 1
-                            )
-                            job_storage.add_log(job_id, f"Rendered page {i + 1}/{len(pages_data)}")
+                            resources = rendered['metadata'].get('resources')
+                            if resources and resources['blocked']:
+                                job_storage.add_log(
+                                    job_id,
+                                    f"Blocked {resources['blocked']}/{resources['requests']} requests "
+                                    f"on {page.url} ({resources['bytes_loaded']:,} bytes loaded)"
+                                )
+                            await loop.run_in_executor(None, store.add, i, page.url, rendered)
                         except Exception as e:
                             import traceback
                             error_trace = traceback.format_exc()
@@ -180,8 +334,50 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
                             job_storage.add_log(job_id, f"ERROR: {error_msg}")
                             print(f">>> ERROR rendering page {page.url}: {e}")
                             print(f"Full traceback:\n{error_trace}")
-                            # Re-raise to stop processing on error
                             raise
+                    
+                    # The renderer limits how many pages are in flight; the store
+                    # keeps the pages in crawl order whatever order they finish in
+                    tasks = [asyncio.create_task(render_one(i, page)) for i, page in enumerate(pages_data)]
+                    try:
+                        for done, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+                            await next_result
+                            
+                            # Update progress (50-80%)
+                            progress = 50 + (done / len(pages_data)) * 30
+                            job_storage.update_job(
+                                job_id,
+                                progress=progress,
+                                pages_processed=done
+                            )
+                            job_storage.add_log(job_id, f"Rendered page {done}/{len(pages_data)}")
+                    finally:
+                        # Stop processing on the first error
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                    rendered_pages = store.pages
+                    job_storage.add_log(
+                        job_id,
+                        f"Pages written to disk: {store.html_size:,} bytes of HTML, "
+                        f"{store.assets.unique} unique images"
+                    )
+                    
+                    image_stats = renderer.image_fetcher.cache_stats
+                    image_total = image_stats['hits'] + image_stats['misses']
+                    if settings.IMAGE_CACHE_ENABLED and image_total:
+                        job_storage.add_log(
+                            job_id,
+                            f"Image cache: {image_stats['hits']} hits, {image_stats['misses']} misses "
+                            f"({image_stats['hits'] / image_total:.0%} hit rate)"
+                        )
+                    source_stats = renderer.image_fetcher.source_stats
+                    if source_stats['captured']:
+                        job_storage.add_log(
+                            job_id,
+                            f"Images: {source_stats['captured']} taken from the browser, "
+                            f"{source_stats['downloaded']} downloaded"
+                        )
             except Exception as e:
                 job_storage.add_log(job_id, f"[DEBUG] ERROR creating/entering ContentRenderer: {type(e).__name__}: {str(e)}")
                 raise
@@ -206,43 +402,53 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
         
         # Export to PDF using Playwright (no GTK needed!)
         from datetime import datetime
-        import re
         pdf_path = None
         try:
             print(f">>> Step 7: Starting PDF export, {len(rendered_pages)} pages")
             
-            # Generate meaningful filename from title or URL
-            if rendered_pages and rendered_pages[0].get('title'):
-                # Use the first page title
-                filename_base = rendered_pages[0]['title']
-            else:
-                # Fallback to URL
-                filename_base = str(request.url).split('//')[-1].split('/')[0]
-            
-            # Sanitize filename: remove invalid characters
-            filename_base = re.sub(r'[<>:"/\\|?*]', '', filename_base)
-            filename_base = filename_base.strip()
-            # Limit length
-            if len(filename_base) > 100:
-                filename_base = filename_base[:100]
-            # Fallback if empty
-            if not filename_base:
-                filename_base = f"document_{job_id[:8]}"
+            # Generate meaningful filename from the first page title or URL
+            first_title = rendered_pages[0].get('title') if rendered_pages else None
+            filename_base = _filename_base(first_title, str(request.url), job_id)
             
             pdf_filename = f"{filename_base}.pdf"
             # Create a clean download filename
             download_filename = f"docforge-{filename_base}.pdf"
             job_storage.add_log(job_id, f"Exporting as: {pdf_filename}")
             
-            # Use Playwright PDF exporter - works on all platforms without dependencies
-            exporter = PlaywrightPDFExporter(settings.EXPORT_DIR, job_storage=job_storage, job_id=job_id)
-            print(f"Exporter created, calling export with filename: {pdf_filename}")
-            pdf_path = await exporter.export(
-                rendered_pages,
-                pdf_filename,
-                include_toc=True,
-                include_cover=True
-            )
+            if engine == PdfEngine.WEASYPRINT:
+                # WeasyPrint lays out the document in the process pool, no browser involved
+                job_storage.add_log(job_id, f"Rendering {len(rendered_pages)} pages with WeasyPrint...")
+                job_storage.update_job(job_id, progress=85, current_step="Rendering PDF pages...")
+                try:
+                    pdf_path = await weasyprint_pool.run(
+                        export_pdf,
+                        settings.EXPORT_DIR,
+                        rendered_pages,
+                        pdf_filename,
+                        True,
+                        True,
+                        None,
+                        store.build_dir
+                    )
+                except BrokenProcessPool:
+                    # The pool has been replaced for later jobs; print this one with Chromium
+                    job_storage.add_log(
+                        job_id,
+                        "⚠ WeasyPrint worker process crashed (possibly out of memory), using Playwright"
+                    )
+                    engine = PdfEngine.PLAYWRIGHT
+            
+            if engine == PdfEngine.PLAYWRIGHT:
+                # Use Playwright PDF exporter - works on all platforms without dependencies
+                exporter = PlaywrightPDFExporter(settings.EXPORT_DIR, job_storage=job_storage, job_id=job_id)
+                print(f"Exporter created, calling export with filename: {pdf_filename}")
+                pdf_path = await exporter.export(
+                    rendered_pages,
+                    pdf_filename,
+                    include_toc=True,
+                    include_cover=True,
+                    build_dir=store.build_dir
+                )
             print(f"PDF export successful: {pdf_path}")
             job_storage.add_log(job_id, "✓ PDF document ready for download!")
             
@@ -256,14 +462,9 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
             job_storage.add_log(job_id, f"PDF export failed: {str(e)}")
             job_storage.add_log(job_id, "Saving as HTML instead...")
             
-            # Save rendered pages as HTML
+            # Save rendered pages as HTML, copied from the page store on disk
             html_output_dir = os.path.join(settings.EXPORT_DIR, job_id)
-            os.makedirs(html_output_dir, exist_ok=True)
-            
-            for i, page in enumerate(rendered_pages):
-                page_file = os.path.join(html_output_dir, f"page_{i+1}.html")
-                with open(page_file, 'w', encoding='utf-8') as f:
-                    f.write(page.get('html', ''))
+            await loop.run_in_executor(None, store.copy_to, html_output_dir)
             
             # Create index file
             index_file = os.path.join(html_output_dir, 'index.html')
@@ -318,6 +519,11 @@ async def process_crawl_job(job_id: str, request: CrawlRequest):
             error=error_msg,
             completed_at=datetime.now().isoformat()
         )
+    finally:
+        for crawler in crawlers:
+            crawler.cleanup()
+        if store is not None:
+            store.cleanup()
 
 
 @router.post("/crawl", response_model=CrawlResponse)
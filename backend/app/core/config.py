@@ -3,7 +3,7 @@ Core configuration settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -26,11 +26,100 @@ class Settings(BaseSettings):
     # Export Configuration
     EXPORT_DIR: str = "./exports"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    PDF_CHUNK_PAGES: int = 50  # Print larger exports in sections of this many pages (0 = one document)
+    PDF_CHUNK_CONCURRENCY: int = 3  # Sections printed at once
+    PDF_STREAM_CHUNK_SIZE: int = 1024 * 1024  # Bytes read per step when streaming a PDF out of Chromium
+    DIRECT_PRINT_SINGLE_PAGE: bool = True  # Print single-page jobs straight from the loaded page
+    PDF_ENGINE: str = "playwright"  # Default PDF engine: playwright or weasyprint
+    WEASYPRINT_WORKERS: int = 0  # WeasyPrint layout processes (0 = one per CPU core)
     
     # Timeouts
     REQUEST_TIMEOUT: int = 30
     CRAWL_TIMEOUT: int = 3600  # 1 hour
     
+    # HTTP connection pool
+    HTTP_POOL_SIZE: int = 100
+    HTTP_POOL_SIZE_PER_HOST: int = 8
+    HTTP_DNS_CACHE_TTL: int = 300  # seconds
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0  # seconds
+    
+    # Per-host rate limiting
+    RATE_LIMIT_BURST: int = 2  # Requests allowed back-to-back before pacing kicks in
+    RATE_LIMIT_MAX_BACKOFF: float = 120.0  # Cap for Retry-After / Crawl-delay, seconds
+    RATE_LIMIT_MAX_RETRIES: int = 2  # Retries after a 429/503 response
+    
+    # Persistent HTTP cache for crawl fetches (conditional GET)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_DIR: str = ""  # Defaults to EXPORT_DIR/.http_cache
+    HTTP_CACHE_MAX_SIZE: int = 500 * 1024 * 1024  # 500MB
+    
+    # Sitemaps
+    SITEMAP_FANOUT: int = 8  # Child sitemaps fetched concurrently
+    SITEMAP_COUNT_LIMIT: int = 50000  # Stop counting sitemap URLs during analysis here
+    
+    # Crawl-time page analysis
+    PAGE_ANALYSIS_MAX_BYTES: int = 0  # Only analyze this much of each page (0 = whole page)
+    
+    # Static-HTML fast path: render pages that don't need JavaScript without a browser
+    STATIC_FAST_PATH: bool = True
+    STATIC_MIN_WORDS: int = 50  # Pages with less text are treated as JavaScript-rendered
+    
+    # Rendering
+    RENDER_CONCURRENCY: int = 4  # Pages rendered at once (browser tabs in flight)
+    RENDER_READY_TIMEOUT: float = 10.0  # Hard per-page budget for the content to settle, seconds
+    RENDER_DOM_QUIET_MS: int = 500  # Content counts as settled after this long without DOM changes
+    RENDER_REQUEST_GRACE_MS: int = 1000  # Fetch/XHR calls in flight longer than this (long-polling, streams, beacons) don't hold up readiness
+    RENDER_CAPTURE_IMAGES: bool = True  # Embed images the browser already downloaded instead of fetching them again
+    RENDER_CAPTURE_TIMEOUT: float = 5.0  # Wait this long for captured image bodies still being read, seconds
+    
+    # Image downloads during rendering
+    IMAGE_FETCH_PER_HOST: int = 4  # Concurrent image downloads per host
+    IMAGE_FETCH_TIMEOUT: float = 15.0  # Per image, seconds
+    IMAGE_PAGE_BUDGET: float = 30.0  # All images of one page, seconds
+    
+    # Image optimization (process pool)
+    IMAGE_WORKERS: int = 0  # Optimizer processes (0 = one per CPU core)
+    IMAGE_PROFILES: Dict[str, Dict[str, int]] = {
+        "draft": {"max_width": 600, "quality": 70},
+        "standard": {"max_width": 800, "quality": 85},
+        "high": {"max_width": 1400, "quality": 92}
+    }
+    IMAGE_SKIP_MAX_BYTES: int = 150 * 1024  # Embed JPEGs this small as-is if they fit the width
+    
+    # Optimized image cache shared across pages and jobs
+    IMAGE_CACHE_ENABLED: bool = True
+    IMAGE_CACHE_DIR: str = ""  # Defaults to EXPORT_DIR/.image_cache
+    IMAGE_CACHE_MAX_SIZE: int = 500 * 1024 * 1024  # 500MB
+    IMAGE_CACHE_TTL: int = 24 * 3600  # Serve without revalidating for this long, seconds
+    RENDER_BLOCK_RESOURCES: bool = True  # Abort requests content extraction doesn't need
+    RENDER_BLOCKED_TYPES: List[str] = [
+        "media", "font", "websocket", "eventsource", "manifest", "texttrack", "ping"
+    ]
+    RENDER_BLOCKED_DOMAINS: List[str] = [
+        # Analytics and tag managers
+        "google-analytics.com", "googletagmanager.com", "analytics.google.com",
+        "segment.com", "segment.io", "mixpanel.com", "amplitude.com", "heapanalytics.com",
+        "hotjar.com", "fullstory.com", "clarity.ms", "plausible.io", "nr-data.net",
+        "optimizely.com", "hs-analytics.net", "hs-scripts.com", "hs-banner.com",
+        # Ads
+        "doubleclick.net", "googlesyndication.com", "googleadservices.com",
+        "adservice.google.com", "amazon-adsystem.com", "adnxs.com", "taboola.com",
+        "outbrain.com", "carbonads.com", "buysellads.com",
+        # Social trackers
+        "facebook.net", "platform.twitter.com", "ads-twitter.com",
+        "snap.licdn.com",
+        # Chat and support widgets
+        "intercom.io", "intercomcdn.com", "crisp.chat",
+        "js.driftt.com", "drift.com", "zdassets.com", "tawk.to", "livechatinc.com"
+    ]
+    
+    # Shared browser pool
+    BROWSER_POOL_SIZE: int = 2  # Warm Chromium processes
+    BROWSER_MAX_CONTEXTS: int = 8  # Contexts leased at once per browser
+    BROWSER_RECYCLE_PAGES: int = 200  # Restart a browser after this many contexts (0 = never)
+    BROWSER_RECYCLE_RSS_MB: int = 1024  # Restart a browser above this memory use (0 = never)
+    BROWSER_RSS_CHECK_EVERY: int = 20  # Measure a browser's memory use every this many contexts
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,120 @@
+"""
+Shared base for the on-disk caches
+"""
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class DiskCache:
+    """
+    On-disk cache with crash-safe writes and least-recently-used eviction
+
+    Files are written to a temporary name and renamed into place, so a
+    crash never leaves a truncated file behind. Disk access runs in the
+    default thread pool through _run() to keep it off the event loop.
+
+    The sizes of the cache's data files (the files in `data_dir` that
+    _is_data_file() accepts) are kept in an in-memory index in
+    least-recently-used order. It is built from one directory scan on first
+    use and kept up to date after that; once the data files add up to more
+    than `max_size` bytes, they are evicted from the front of the index
+    until the cache is 90% full.
+    """
+
+    label = 'DiskCache'  # Log prefix of the subclass
+
+    def __init__(self, cache_dir: str, data_dir: str, max_size: int):
+        self.cache_dir = cache_dir
+        self.data_dir = data_dir
+        self.max_size = max_size
+        self._index: Optional[OrderedDict] = None  # Data file name -> size, least recently used first
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    def conditional_headers(self, entry: Dict) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a cached entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    def _write_atomic(self, path: str, data: bytes):
+        """Write-then-rename so readers never see a partial file"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _touch(self, name: str):
+        """Mark a data file as recently used"""
+        with self._lock:
+            index = self._get_index()
+            if name in index:
+                index.move_to_end(name)
+
+    def _add(self, name: str, size: int):
+        """Record a data file that was written, evicting others if the cache is full"""
+        with self._lock:
+            index = self._get_index()
+            self._total_size += size - index.pop(name, 0)
+            index[name] = size
+            if self._total_size > self.max_size:
+                self._evict()
+
+    def _remove(self, name: str):
+        """Delete an evicted data file; subclasses also delete its companions"""
+        try:
+            os.remove(os.path.join(self.data_dir, name))
+        except OSError:
+            pass
+
+    def _is_data_file(self, name: str) -> bool:
+        return not name.endswith('.tmp')
+
+    def _evict(self):
+        """Delete least recently used data files until the cache is 90% full (lock held)"""
+        target = self.max_size * 0.9
+        evicted = 0
+
+        while self._index and self._total_size > target:
+            name, size = self._index.popitem(last=False)
+            self._remove(name)
+            self._total_size -= size
+            evicted += 1
+
+        print(f"[{self.label}] Evicted {evicted} entries, cache size now {self._total_size:,} bytes")
+
+    def _get_index(self) -> OrderedDict:
+        """LRU index of the data files, scanned from disk on first use (lock held)"""
+        if self._index is None:
+            entries = []
+            if os.path.isdir(self.data_dir):
+                for name in os.listdir(self.data_dir):
+                    if not self._is_data_file(name):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(self.data_dir, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name, stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((name, size) for _, name, size in entries)
+            self._total_size = sum(self._index.values())
+        return self._index
@@ -0,0 +1,128 @@
+"""
+Persistent HTTP cache for crawl fetches
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.disk_cache import DiskCache
+
+
+class HTTPCache(DiskCache):
+    """
+    On-disk cache of fetched pages revalidated with conditional GETs
+
+    Each entry is a body file plus a JSON metadata file holding the ETag and
+    Last-Modified validators. Bodies are the data files DiskCache evicts in
+    least-recently-used order; their metadata goes with them.
+    """
+
+    label = 'HTTPCache'
+
+    def __init__(self, cache_dir: str, max_size: int):
+        super().__init__(cache_dir, cache_dir, max_size)
+
+    async def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Get metadata for a cached entry
+
+        Args:
+            key: Cache key (canonical URL)
+
+        Returns:
+            Dict with 'etag', 'last_modified' and 'final_url', or None
+        """
+        return await self._run(self._read_meta, key)
+
+    async def load(self, key: str) -> Optional[str]:
+        """Read a cached body and mark it as recently used"""
+        return await self._run(self._read_body, key)
+
+    async def store(
+        self,
+        key: str,
+        body: str,
+        final_url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """
+        Store a response that carries validators
+
+        Responses without an ETag or Last-Modified can't be revalidated, so
+        they are not cached.
+        """
+        if not etag and not last_modified:
+            return
+        await self._run(self._write_entry, key, body, final_url, etag, last_modified)
+
+    def _read_meta(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key, '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_body(self, key: str) -> Optional[str]:
+        body_path = self._path(key, '.body')
+        try:
+            with open(body_path, 'r', encoding='utf-8') as f:
+                body = f.read()
+            os.utime(body_path)
+        except OSError:
+            return None
+
+        self._touch(os.path.basename(body_path))
+        return body
+
+    def _write_entry(
+        self,
+        key: str,
+        body: str,
+        final_url: str,
+        etag: Optional[str],
+        last_modified: Optional[str]
+    ):
+        body_path = self._path(key, '.body')
+        data = body.encode('utf-8')
+        meta = json.dumps({
+            'key': key,
+            'final_url': final_url,
+            'etag': etag,
+            'last_modified': last_modified
+        }).encode('utf-8')
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_atomic(body_path, data)
+            self._write_atomic(self._path(key, '.json'), meta)
+        except OSError as e:
+            print(f"[HTTPCache] Failed to store {key}: {e}")
+            return
+
+        self._add(os.path.basename(body_path), len(data))
+
+    def _remove(self, name: str):
+        super()._remove(name)
+        try:
+            os.remove(os.path.join(self.cache_dir, name[:-len('.body')] + '.json'))
+        except OSError:
+            pass
+
+    def _is_data_file(self, name: str) -> bool:
+        return name.endswith('.body')
+
+    def _path(self, key: str, suffix: str) -> str:
+        """File path for a cache key"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + suffix)
+
+
+# Global HTTP cache instance
+http_cache = HTTPCache(
+    settings.HTTP_CACHE_DIR or os.path.join(settings.EXPORT_DIR, '.http_cache'),
+    settings.HTTP_CACHE_MAX_SIZE
+)
@@ -0,0 +1,62 @@
+"""
+Shared HTTP client with connection pooling
+"""
+
+import aiohttp
+from typing import Optional
+
+from app.core.config import settings
+
+
+class HTTPClient:
+    """Application-scoped aiohttp session with keep-alive pooling and DNS caching"""
+
+    def __init__(
+        self,
+        pool_size: int = settings.HTTP_POOL_SIZE,
+        pool_size_per_host: int = settings.HTTP_POOL_SIZE_PER_HOST,
+        dns_cache_ttl: int = settings.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout: float = settings.HTTP_KEEPALIVE_TIMEOUT
+    ):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        """Create the pooled session (called from the application lifespan)"""
+        session = self.session
+        print(f"[HTTPClient] Connection pool ready (limit={self.pool_size}, per_host={self.pool_size_per_host})")
+        return session
+
+    async def close(self):
+        """Close the session and release pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared session
+
+        The session is created lazily if the lifespan has not started it yet
+        (e.g. when crawlers are used from scripts), so callers never open their own.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
+            )
+        return self._session
+
+
+# Global HTTP client instance
+http_client = HTTPClient()
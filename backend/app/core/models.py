@@ -25,6 +25,19 @@ class ExportFormat(str, Enum):
     ZIP = "zip"
 
 
+class PdfEngine(str, Enum):
+    """PDF rendering engines"""
+    PLAYWRIGHT = "playwright"
+    WEASYPRINT = "weasyprint"
+
+
+class ImageProfile(str, Enum):
+    """Image width/quality profiles (see settings.IMAGE_PROFILES)"""
+    DRAFT = "draft"
+    STANDARD = "standard"
+    HIGH = "high"
+
+
 class AnalyzeRequest(BaseModel):
     """Request model for URL analysis"""
     url: HttpUrl
@@ -59,6 +72,10 @@ class CrawlConfig(BaseModel):
     respect_canonical: bool = True
     exclude_patterns: List[str] = Field(default_factory=list)
     request_delay: float = Field(default=1.0, ge=0.1, le=10.0)
+    concurrency: int = Field(default=4, ge=1, le=16)
+    preserve_order: bool = True  # Sitemap crawls: yield pages in sitemap order, not completion order
+    image_profile: ImageProfile = ImageProfile.STANDARD
+    pdf_engine: Optional[PdfEngine] = None  # Defaults to the deployment's PDF_ENGINE
 
 
 class CrawlRequest(BaseModel):
@@ -107,6 +124,8 @@ class JobStatusResponse(BaseModel):
     pages_processed: int = 0
     pages: List[PageInfo] = Field(default_factory=list)
     logs: List[str] = Field(default_factory=list)  # Activity logs
+    http_cache: Dict[str, int] = Field(default_factory=dict)  # Crawl cache hits/misses
+    pdf_bytes_written: int = 0  # PDF bytes streamed to disk so far during export
     error: Optional[str] = None
     created_at: str
     completed_at: Optional[str] = None
@@ -0,0 +1,60 @@
+"""
+Process pool that replaces itself when a worker dies
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ProcessPool:
+    """
+    Spawn-based process pool for CPU-bound work off the event loop
+
+    When a worker dies (killed for running out of memory, a crash in a C
+    extension), ProcessPoolExecutor marks itself broken and fails every
+    later submission. run() notices that, starts a fresh executor for the
+    following calls and re-raises BrokenProcessPool for the calls that
+    were in flight, so one bad input doesn't disable the pool until the
+    app restarts. Workers are spawned rather than forked because the
+    parent runs the browser and render threads.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = self._create()
+
+    async def run(self, func, *args):
+        """
+        Run a picklable module-level function in the pool
+
+        Raises:
+            BrokenProcessPool: A worker died while the call was pending
+        """
+        executor = self._executor
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def shutdown(self):
+        """Stop the workers without waiting for queued work"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        # Calls that failed together must only replace the pool once
+        if self._executor is not broken:
+            return
+        print(f"[{self.name}] A worker process died; starting a new process pool")
+        self._executor = self._create()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _create(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
@@ -29,6 +29,8 @@ class JobStorage:
             'pages_processed': 0,
             'pages': [],
             'logs': [],
+            'http_cache': {'hits': 0, 'misses': 0},
+            'pdf_bytes_written': 0,
             'error': None,
             'created_at': datetime.now().isoformat(),
             'completed_at': None,
@@ -3,8 +3,19 @@ Base crawler interface
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, AsyncIterator
+from typing import List, Dict, AsyncIterator, Optional, Tuple
+from urllib.parse import urljoin
+import asyncio
+import os
+import shutil
+import tempfile
+import aiohttp
+from app.core.config import settings
+from app.core.http_cache import http_cache
+from app.core.http_client import http_client
 from app.core.models import PageInfo, CrawlConfig
+from app.crawler.canonical import canonical_key
+from app.crawler.rate_limiter import rate_limiter
 
 
 class BaseCrawler(ABC):
@@ -13,7 +24,14 @@ class BaseCrawler(ABC):
     def __init__(self, config: CrawlConfig, user_agent: str):
         self.config = config
         self.user_agent = user_agent
-        self.visited_urls = set()
+        self.visited_urls = set()  # Canonical keys of fetched URLs
+        self.canonical_urls = set()  # Canonical keys declared via <link rel="canonical">
+        self.rate_limiter = rate_limiter
+        self.cache_stats = {'hits': 0, 'misses': 0}  # Persistent HTTP cache counters for this job
+        self.static_pages: Dict[str, Tuple[str, str]] = {}  # url -> (HTML file, final URL) for pages that render without JavaScript
+        self._static_dir: Optional[str] = None  # Created on the first static page
+        self._static_count = 0
+        self.warnings: List[str] = []  # Problems that left the crawl incomplete, reported on the job
     
     @abstractmethod
     async def crawl(self, start_url: str) -> AsyncIterator[PageInfo]:
@@ -28,10 +46,80 @@ class BaseCrawler(ABC):
         """
         pass
     
+    async def fetch(self, url: str) -> Tuple[int, str, str]:
+        """
+        GET a page through the shared connection pool
+        
+        Waits for the host's rate limiter before each attempt and retries
+        429/503 responses after backing off. When the persistent HTTP cache is
+        enabled, cached pages are revalidated with a conditional GET and served
+        from disk on 304 Not Modified.
+        
+        Args:
+            url: URL to fetch
+            
+        Returns:
+            Tuple of (status, body text or '' if not 200, final URL after redirects)
+        """
+        key = canonical_key(url)
+        cached = await http_cache.lookup(key) if settings.HTTP_CACHE_ENABLED else None
+        attempt = 0
+        
+        while True:
+            await self.rate_limiter.acquire(url, self.config.request_delay)
+            
+            headers = {"User-Agent": self.user_agent}
+            if cached:
+                headers.update(http_cache.conditional_headers(cached))
+            
+            session = http_client.session
+            async with session.get(
+                url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT)
+            ) as response:
+                if response.status in (429, 503) and attempt < settings.RATE_LIMIT_MAX_RETRIES:
+                    self.rate_limiter.backoff(url, response.headers.get('Retry-After'))
+                    attempt += 1
+                    continue
+                
+                if response.status == 304 and cached:
+                    self.rate_limiter.record_success(url)
+                    body = await http_cache.load(key)
+                    if body is not None:
+                        self.cache_stats['hits'] += 1
+                        return 200, body, cached.get('final_url') or url
+                    # Entry was evicted meanwhile - fetch it once more
+                    # unconditionally, which doesn't count as a retry
+                    cached = None
+                    continue
+                
+                if response.status != 200:
+                    if response.status in (429, 503):
+                        self.rate_limiter.backoff(url, response.headers.get('Retry-After'))
+                    return response.status, '', str(response.url)
+                
+                self.rate_limiter.record_success(url)
+                body = await response.text()
+                
+                if settings.HTTP_CACHE_ENABLED:
+                    self.cache_stats['misses'] += 1
+                    if 'no-store' not in response.headers.get('Cache-Control', '').lower():
+                        await http_cache.store(
+                            key,
+                            body,
+                            str(response.url),
+                            etag=response.headers.get('ETag'),
+                            last_modified=response.headers.get('Last-Modified')
+                        )
+                
+                return response.status, body, str(response.url)
+    
     def should_crawl(self, url: str) -> bool:
         """Check if URL should be crawled based on configuration"""
-        # Already visited
-        if url in self.visited_urls:
+        # Already visited (or declared as the canonical URL of a visited page)
+        key = canonical_key(url)
+        if key in self.visited_urls or key in self.canonical_urls:
             return False
         
         # Check exclude patterns
@@ -44,3 +132,74 @@ class BaseCrawler(ABC):
             return False
         
         return True
+    
+    def mark_visited(self, url: str):
+        """Record a URL as crawled under its canonical key"""
+        self.visited_urls.add(canonical_key(url))
+    
+    async def keep_static_html(self, url: str, content: str, final_url: str, analysis: Dict):
+        """
+        Keep the fetched HTML of a page that doesn't need JavaScript
+        
+        The renderer builds these pages straight from this HTML instead of
+        loading them again in the browser. The HTML is written to a file for
+        the rest of the crawl, so only its path stays in memory; cleanup()
+        deletes the files.
+        
+        Args:
+            url: URL of the page (as in its PageInfo)
+            content: Fetched HTML
+            final_url: URL after redirects, used to resolve relative links
+            analysis: Result of analyze_page() for the content
+        """
+        if not settings.STATIC_FAST_PATH or analysis['needs_javascript']:
+            return
+        
+        if self._static_dir is None:
+            os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+            self._static_dir = tempfile.mkdtemp(prefix='.static-', dir=settings.EXPORT_DIR)
+        self._static_count += 1
+        html_path = os.path.join(self._static_dir, f"{self._static_count:06d}.html")
+        
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, self._write_static_html, html_path, content)
+        except OSError as e:
+            # The browser renders the page instead
+            print(f"[Crawler] Failed to keep the HTML of {url}: {e}")
+            return
+        self.static_pages[url] = (html_path, final_url)
+    
+    def _write_static_html(self, html_path: str, content: str):
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    def cleanup(self):
+        """Delete the HTML kept for static pages"""
+        if self._static_dir is not None:
+            shutil.rmtree(self._static_dir, ignore_errors=True)
+            self._static_dir = None
+        self.static_pages.clear()
+    
+    def is_canonical_duplicate(self, url: str, canonical_href: Optional[str]) -> bool:
+        """
+        Honor <link rel="canonical"> when respect_canonical is enabled
+        
+        Args:
+            url: URL the page was fetched from
+            canonical_href: href of the page's canonical link, if any
+            
+        Returns:
+            True if the page's canonical URL has already been crawled
+        """
+        if not self.config.respect_canonical or not canonical_href:
+            return False
+        
+        key = canonical_key(urljoin(url, canonical_href.strip()))
+        if key == canonical_key(url):
+            return False
+        if key in self.visited_urls or key in self.canonical_urls:
+            return True
+        
+        self.canonical_urls.add(key)
+        return False
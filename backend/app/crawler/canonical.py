@@ -0,0 +1,77 @@
+"""
+URL canonicalization used for crawl deduplication
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that never change page content. Generic names such as
+# `ref` are left alone: sites use them for real content (e.g. a git branch)
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL into the form the crawlers fetch
+
+    Lower-cases scheme and host, drops default ports and fragments and strips
+    tracking parameters. The path (including any trailing slash) is kept so
+    directory-style URLs don't cost an extra redirect.
+
+    Args:
+        url: Absolute URL
+
+    Returns:
+        Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        credentials = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{credentials}@{netloc}"
+
+    path = parts.path or "/"
+
+    query = parts.query
+    if query:
+        params = parse_qsl(query, keep_blank_values=True)
+        kept = [
+            (key, value) for key, value in params
+            if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+        ]
+        # Only re-encode when something was stripped, to keep the original escaping
+        if len(kept) != len(params):
+            query = urlencode(kept)
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def canonical_key(url: str) -> str:
+    """
+    Get the deduplication key for a URL
+
+    Same as normalize_url() but with trailing slashes removed, so `/docs/intro`
+    and `/docs/intro/` map to one key.
+    """
+    normalized = normalize_url(url)
+    parts = urlsplit(normalized)
+    path = parts.path
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme, parts.netloc, path, parts.query, ""))
@@ -0,0 +1,91 @@
+"""
+Crawl frontier with constant-time enqueue and membership checks
+"""
+
+import asyncio
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+
+from app.crawler.canonical import canonical_key
+
+
+class URLFrontier:
+    """
+    FIFO frontier of (url, depth) pairs for breadth-first crawling
+
+    Deques hold the pending URLs of the current depth and of the next one,
+    and a set holds the canonical key of every URL ever enqueued. The
+    crawler's visited set (also canonical keys) is consulted as well, so a
+    link is only fetched once no matter how many pages reference it or how
+    its URL is spelled.
+
+    The frontier is expanded one level at a time: no URL at depth d + 1 is
+    handed out until every URL taken at depth d has been marked done, and so
+    has pushed its links. Every URL is therefore first reached at its
+    shallowest depth, however concurrent fetches interleave.
+    """
+
+    def __init__(self, visited: Optional[Set[str]] = None):
+        self._current: Deque[Tuple[str, int]] = deque()
+        self._next: Deque[Tuple[str, int]] = deque()
+        self._seen: Set[str] = set()
+        self._visited = visited if visited is not None else set()
+        self._changed = asyncio.Event()
+        self.depth = 0  # Depth of the level being handed out
+        self.in_flight = 0  # URLs of the current level taken but not yet marked done
+        self.unfinished = 0  # Queued URLs plus URLs taken but not yet marked done
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._next)
+
+    def __contains__(self, url: str) -> bool:
+        key = canonical_key(url)
+        return key in self._seen or key in self._visited
+
+    def push(self, url: str, depth: int) -> bool:
+        """
+        Enqueue a URL unless it was already queued or visited
+
+        Returns:
+            True if the URL was added
+        """
+        key = canonical_key(url)
+        if key in self._seen or key in self._visited:
+            return False
+
+        self._seen.add(key)
+        if depth <= self.depth:
+            self._current.append((url, depth))
+            self._changed.set()
+        else:
+            self._next.append((url, depth))
+        self.unfinished += 1
+        return True
+
+    async def get(self) -> Tuple[str, int]:
+        """Wait for and remove the oldest (url, depth) pair of the current level"""
+        while True:
+            if self._current:
+                self.in_flight += 1
+                return self._current.popleft()
+            if self._next and self.in_flight == 0:
+                # Level finished - move on to the next one
+                self._current, self._next = self._next, deque()
+                self.depth += 1
+                continue
+            self._changed.clear()
+            await self._changed.wait()
+
+    def task_done(self) -> bool:
+        """
+        Mark a URL taken with get() as processed
+
+        Returns:
+            True once the frontier is drained and no URL is still being processed
+        """
+        self.in_flight -= 1
+        self.unfinished -= 1
+        if self.in_flight == 0 and not self._current:
+            # Wake workers waiting for the next level
+            self._changed.set()
+        return self.unfinished == 0
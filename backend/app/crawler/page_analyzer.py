@@ -0,0 +1,173 @@
+"""
+Fast single-pass page analysis for crawl-time metadata
+"""
+
+from typing import Dict, List, Optional, Union
+
+from lxml import etree
+
+from app.core.config import settings
+
+# Elements whose text is not page content (matches BeautifulSoup.get_text())
+SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+
+# Mount points of client-rendered apps (React, Vue, Next.js, Nuxt, Gatsby, Angular)
+APP_ROOT_IDS = {'root', 'app', '__next', '__nuxt', '___gatsby'}
+APP_ROOT_ATTRS = ('ng-app', 'ng-version', 'data-reactroot')
+
+
+class _PageAnalysisTarget:
+    """lxml parser target that collects metadata while the document is parsed"""
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.has_images = False
+        self.word_count = 0
+        self.links: List[str] = []
+        self.canonical: Optional[str] = None
+        self.app_root_words: Optional[int] = None  # Words inside an app mount point, if any
+        self._title_parts: Optional[List[str]] = None
+        self._skip_depth = 0
+        self._depth = 0
+        self._app_root_depth: Optional[int] = None
+        self._in_word = False  # Previous text chunk ended inside a word
+
+    def start(self, tag, attrib):
+        if not isinstance(tag, str):
+            return
+        tag = tag.lower()
+        self._depth += 1
+
+        if self.app_root_words is None and (
+            attrib.get('id') in APP_ROOT_IDS or any(name in attrib for name in APP_ROOT_ATTRS)
+        ):
+            self.app_root_words = 0
+            self._app_root_depth = self._depth
+
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag == 'a':
+            href = attrib.get('href')
+            if href:
+                self.links.append(href)
+        elif tag == 'img':
+            self.has_images = True
+        elif tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'link' and self.canonical is None:
+            rel = (attrib.get('rel') or '').lower().split()
+            if 'canonical' in rel and attrib.get('href'):
+                self.canonical = attrib['href']
+
+    def end(self, tag):
+        if not isinstance(tag, str):
+            return
+        tag = tag.lower()
+        if self._app_root_depth == self._depth:
+            self._app_root_depth = None
+        self._depth -= 1
+
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts).strip() or None
+            self._title_parts = None
+
+    def data(self, text):
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        if self._skip_depth or not text:
+            return
+
+        # Text chunks are joined without separators, like get_text(), so a word
+        # split across chunks (e.g. "foo<b>bar</b>") counts once
+        words = len(text.split())
+        if words and self._in_word and not text[0].isspace():
+            words -= 1
+        self.word_count += words
+        if self._app_root_depth is not None:
+            self.app_root_words += words
+        if text.strip():
+            self._in_word = not text[-1].isspace()
+        else:
+            self._in_word = False
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return self
+
+
+def _parse(content: Union[str, bytes]) -> _PageAnalysisTarget:
+    """Run the document through lxml's HTML parser with the collecting target"""
+    target = _PageAnalysisTarget()
+    parser = etree.HTMLParser(target=target, recover=True)
+    try:
+        parser.feed(content)
+        parser.close()
+    except etree.ParserError:
+        pass  # Empty or hopelessly broken document
+    return target
+
+
+def needs_javascript(target: _PageAnalysisTarget, min_words: int) -> bool:
+    """
+    Decide whether a page's content only exists after JavaScript runs
+
+    Static site generators (MkDocs, Sphinx, Hugo, ...) ship the full text in
+    the HTML. Client-rendered apps ship a near-empty shell, usually an empty
+    mount point such as <div id="root">, and build the content in the browser.
+    """
+    if target.word_count < min_words:
+        return True
+    if target.app_root_words is not None and target.app_root_words < min_words:
+        return True
+    return False
+
+
+def analyze_page(
+    content: Union[str, bytes],
+    max_bytes: Optional[int] = None,
+    min_words: int = settings.STATIC_MIN_WORDS
+) -> Dict:
+    """
+    Extract title, image presence, word count, links and canonical URL
+
+    Everything is collected in a single streaming pass of lxml's HTML parser;
+    no tree is built.
+
+    Args:
+        content: HTML document
+        max_bytes: Only parse this much of the document (characters for str
+            input). Title and links in the head are unaffected; word count and
+            links are then partial.
+        min_words: Pages with less text than this (overall, or inside an app
+            mount point) are classified as needing JavaScript
+
+    Returns:
+        Dict with 'title', 'has_images', 'word_count', 'links' (raw hrefs),
+        'canonical' (raw href or None), 'needs_javascript' and 'truncated'
+    """
+    truncated = False
+    if max_bytes and len(content) > max_bytes:
+        content = content[:max_bytes]
+        truncated = True
+
+    try:
+        target = _parse(content)
+    except ValueError:
+        if not isinstance(content, str):
+            raise
+        # lxml rejects str input carrying an XML encoding declaration
+        target = _parse(content.encode('utf-8'))
+
+    return {
+        'title': target.title,
+        'has_images': target.has_images,
+        'word_count': target.word_count,
+        'links': target.links,
+        'canonical': target.canonical,
+        'needs_javascript': needs_javascript(target, min_words),
+        'truncated': truncated
+    }
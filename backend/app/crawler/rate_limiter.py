@@ -0,0 +1,208 @@
+"""
+Per-host request rate limiting for crawlers
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.http_client import http_client
+
+
+class TokenBucket:
+    """Token bucket for one host"""
+
+    def __init__(self, interval: float, capacity: float, updated: float):
+        self.interval = interval  # Seconds per token
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = updated
+        self.blocked_until = 0.0  # Set by Retry-After / backoff
+        self.failures = 0  # Consecutive throttled responses
+
+    def reserve(self, now: float) -> float:
+        """
+        Take one token, going into debt if none is left
+
+        Returns:
+            Seconds the caller must wait before sending its request
+        """
+        if self.interval > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = self.capacity
+        self.updated = now
+        self.tokens -= 1
+
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 0:
+            wait += -self.tokens * self.interval
+        return wait
+
+
+class HostRateLimiter:
+    """
+    Token-bucket rate limiter keyed by host
+
+    Buckets refill at one token per `max(request_delay, Crawl-delay)` seconds,
+    where Crawl-delay is read once per host from robots.txt. Throttled
+    responses (429/503) block the host for the Retry-After period, or an
+    exponential backoff when the header is missing. One instance is shared by
+    every crawler so concurrent workers and jobs draw from the same buckets.
+    """
+
+    def __init__(
+        self,
+        user_agent: str = settings.USER_AGENT,
+        burst: int = settings.RATE_LIMIT_BURST,
+        max_backoff: float = settings.RATE_LIMIT_MAX_BACKOFF
+    ):
+        self.user_agent = user_agent
+        self.burst = burst
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._crawl_delays: Dict[str, Optional[float]] = {}
+        self._robots_tasks: Dict[str, asyncio.Task] = {}
+
+    async def acquire(self, url: str, delay: float):
+        """
+        Wait until a request to the URL's host may be sent
+
+        Args:
+            url: URL about to be requested
+            delay: Requested minimum delay between requests (CrawlConfig.request_delay)
+        """
+        host = self._get_host(url)
+        crawl_delay = await self._get_crawl_delay(url)
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        interval = max(delay, crawl_delay or 0.0)
+        # A robots.txt Crawl-delay means strictly one request per interval
+        capacity = 1 if crawl_delay else self.burst
+
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(interval, capacity, now)
+            self._buckets[host] = bucket
+        else:
+            bucket.interval = interval
+            bucket.capacity = capacity
+
+        wait = bucket.reserve(now)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def backoff(self, url: str, retry_after: Optional[str] = None) -> float:
+        """
+        Block a host after a 429/503 response
+
+        Args:
+            url: URL that was throttled
+            retry_after: Value of the Retry-After header, if any
+
+        Returns:
+            Seconds the host is blocked for
+        """
+        host = self._get_host(url)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(settings.REQUEST_DELAY, 1, now)
+            self._buckets[host] = bucket
+        bucket.failures += 1
+
+        delay = self._parse_retry_after(retry_after)
+        if delay is None:
+            delay = max(bucket.interval, 1.0) * (2 ** bucket.failures)
+        delay = min(delay, self.max_backoff)
+
+        bucket.blocked_until = max(bucket.blocked_until, now + delay)
+        print(f"[RateLimiter] {host} throttled us, backing off {delay:.1f}s")
+        return delay
+
+    def record_success(self, url: str):
+        """Reset the backoff counter after a successful response"""
+        bucket = self._buckets.get(self._get_host(url))
+        if bucket is not None:
+            bucket.failures = 0
+
+    async def _get_crawl_delay(self, url: str) -> Optional[float]:
+        """Get the robots.txt Crawl-delay for a host, fetching robots.txt once"""
+        host = self._get_host(url)
+        if host in self._crawl_delays:
+            return self._crawl_delays[host]
+
+        # Concurrent callers share one robots.txt fetch per host
+        task = self._robots_tasks.get(host)
+        if task is None:
+            parsed = urlparse(url)
+            task = asyncio.create_task(self._fetch_crawl_delay(f"{parsed.scheme}://{parsed.netloc}/robots.txt"))
+            self._robots_tasks[host] = task
+
+        try:
+            crawl_delay = await asyncio.shield(task)
+        except Exception:
+            crawl_delay = None
+        self._crawl_delays[host] = crawl_delay
+        self._robots_tasks.pop(host, None)
+        return crawl_delay
+
+    async def _fetch_crawl_delay(self, robots_url: str) -> Optional[float]:
+        """Fetch robots.txt and read the Crawl-delay that applies to us"""
+        try:
+            session = http_client.session
+            async with session.get(
+                robots_url,
+                headers={"User-Agent": self.user_agent},
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                if response.status != 200:
+                    return None
+                content = await response.text()
+        except Exception as e:
+            print(f"[RateLimiter] Could not fetch {robots_url}: {e}")
+            return None
+
+        parser = RobotFileParser()
+        parser.parse(content.splitlines())
+        crawl_delay = parser.crawl_delay(self.user_agent)
+        if crawl_delay:
+            crawl_delay = min(float(crawl_delay), self.max_backoff)
+            print(f"[RateLimiter] Crawl-delay {crawl_delay}s from {robots_url}")
+            return crawl_delay
+        return None
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date"""
+        if not value:
+            return None
+        value = value.strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def _get_host(self, url: str) -> str:
+        """Extract the bucket key from a URL"""
+        return urlparse(url).netloc.lower()
+
+
+# Global rate limiter shared by all crawlers
+rate_limiter = HostRateLimiter()
@@ -2,13 +2,15 @@
 Recursive web crawler
 """
 
-import aiohttp
-from typing import AsyncIterator, Set
+from typing import AsyncIterator
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 import asyncio
 
 from app.crawler.base import BaseCrawler
+from app.crawler.canonical import normalize_url
+from app.crawler.frontier import URLFrontier
+from app.crawler.page_analyzer import analyze_page
+from app.core.config import settings
 from app.core.models import PageInfo
 
 
@@ -21,66 +23,93 @@ class RecursiveCrawler(BaseCrawler):
     
     async def crawl(self, start_url: str) -> AsyncIterator[PageInfo]:
         """
-        Recursively crawl from start URL
+        Recursively crawl from start URL using a pool of fetch workers
+        
+        Workers pull (url, depth) pairs from a shared BFS frontier that is
+        expanded one level at a time, so pages are yielded in completion
+        order while every page is reached at its shallowest depth.
         
         Args:
             start_url: Starting URL
-            
+        
         Yields:
             PageInfo for each discovered page
         """
+        start_url = normalize_url(start_url)
         self.domain = self._get_domain(start_url)
         pages_yielded = 0
         
         print(f"[RecursiveCrawler] Starting crawl from {start_url}")
-        print(f"[RecursiveCrawler] Max URLs: {self.config.max_urls}, Max depth: {self.config.max_depth}")
+        print(f"[RecursiveCrawler] Max URLs: {self.config.max_urls}, Max depth: {self.config.max_depth}, Workers: {self.config.concurrency}")
         
-        # BFS queue: (url, depth)
-        queue = [(start_url, 0)]
+        # BFS frontier of (url, depth) and finished fetches
+        frontier = URLFrontier(self.visited_urls)
+        results: asyncio.Queue = asyncio.Queue()
+        frontier.push(start_url, 0)
         
-        while queue and pages_yielded < self.config.max_urls:
-            url, depth = queue.pop(0)
-            
-            # Check depth limit
-            if depth > self.config.max_depth:
-                print(f"[RecursiveCrawler] Skipping {url} - exceeds max depth {self.config.max_depth}")
-                continue
-            
-            if not self.should_crawl(url):
-                print(f"[RecursiveCrawler] Skipping {url} - filtered by crawl rules")
-                continue
-            
-            self.visited_urls.add(url)
-            
-            # Fetch page
-            print(f"[RecursiveCrawler] Crawling ({pages_yielded + 1}/{self.config.max_urls}): {url}")
-            page_info, links = await self._fetch_page(url)
-            
-            if page_info:
-                pages_yielded += 1
-                print(f"[RecursiveCrawler] ✓ Successfully crawled page {pages_yielded}: {page_info.title or url}")
-                yield page_info
+        workers = [
+            asyncio.create_task(self._worker(frontier, results))
+            for _ in range(self.config.concurrency)
+        ]
+        
+        try:
+            while pages_yielded < self.config.max_urls:
+                page_info = await results.get()
                 
-                # Check if we've hit the limit
-                if pages_yielded >= self.config.max_urls:
-                    print(f"[RecursiveCrawler] Reached max URL limit ({self.config.max_urls}). Stopping crawl.")
+                if page_info is None:
                     break
+                
+                pages_yielded += 1
+                print(f"[RecursiveCrawler] ✓ Successfully crawled page {pages_yielded}: {page_info.title or page_info.url}")
+                yield page_info
             
-            # Add discovered links to queue
-            if depth < self.config.max_depth and pages_yielded < self.config.max_urls:
-                new_links = 0
-                for link in links:
-                    if link not in self.visited_urls and link not in [item[0] for item in queue]:
-                        queue.append((link, depth + 1))
-                        new_links += 1
-                if new_links > 0:
-                    print(f"[RecursiveCrawler] Found {new_links} new links at depth {depth}")
-            
-            # Rate limiting
-            await asyncio.sleep(self.config.request_delay)
+            if pages_yielded >= self.config.max_urls:
+                print(f"[RecursiveCrawler] Reached max URL limit ({self.config.max_urls}). Stopping crawl.")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
         
         print(f"[RecursiveCrawler] Crawl complete. Total pages: {pages_yielded}")
     
+    async def _worker(self, frontier: URLFrontier, results: asyncio.Queue):
+        """Fetch URLs from the frontier until the crawl is cancelled"""
+        while True:
+            url, depth = await frontier.get()
+            
+            try:
+                # Check depth limit
+                if depth > self.config.max_depth:
+                    print(f"[RecursiveCrawler] Skipping {url} - exceeds max depth {self.config.max_depth}")
+                    continue
+                
+                if not self.should_crawl(url):
+                    print(f"[RecursiveCrawler] Skipping {url} - filtered by crawl rules")
+                    continue
+                
+                self.mark_visited(url)
+                
+                print(f"[RecursiveCrawler] Crawling ({len(self.visited_urls)}/{self.config.max_urls}): {url}")
+                page_info, links = await self._fetch_page(url)
+                
+                if page_info:
+                    results.put_nowait(page_info)
+                
+                # Add discovered links to the frontier
+                if depth < self.config.max_depth and len(self.visited_urls) < self.config.max_urls:
+                    new_links = 0
+                    for link in links:
+                        if frontier.push(link, depth + 1):
+                            new_links += 1
+                    if new_links > 0:
+                        print(f"[RecursiveCrawler] Found {new_links} new links at depth {depth}")
+            except Exception as e:
+                print(f"[RecursiveCrawler] ✗ Worker error on {url}: {e}")
+            finally:
+                # Sentinel once the frontier is drained and no fetch is in flight
+                if frontier.task_done():
+                    results.put_nowait(None)
+    
     async def _fetch_page(self, url: str) -> tuple:
         """
         Fetch page and extract information and links
@@ -91,49 +120,39 @@ class RecursiveCrawler(BaseCrawler):
         links = []
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    headers={"User-Agent": self.user_agent},
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status != 200:
-                        return None, []
-                    
-                    content = await response.text()
-                    
-                    # Parse HTML
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    # Extract title
-                    title = soup.title.string if soup.title else None
-                    
-                    # Check for images
-                    has_images = len(soup.find_all('img')) > 0
-                    
-                    # Word count
-                    text = soup.get_text()
-                    word_count = len(text.split())
-                    
-                    # Extract links
-                    for link in soup.find_all('a', href=True):
-                        href = link['href']
-                        absolute_url = urljoin(url, href)
-                        
-                        # Only include same-domain links
-                        if self._same_domain(absolute_url):
-                            links.append(absolute_url)
-                    
-                    page_info = PageInfo(
-                        url=url,
-                        title=title,
-                        size=len(content),
-                        has_images=has_images,
-                        word_count=word_count,
-                        status="success"
-                    )
-                    
-                    return page_info, links
+            # base_url is the final URL, so links resolve correctly after redirects
+            status, content, base_url = await self.fetch(url)
+            if status != 200:
+                return None, []
+            
+            # Title, images, word count and links in one parser pass
+            analysis = analyze_page(content, max_bytes=settings.PAGE_ANALYSIS_MAX_BYTES)
+            
+            # Extract links
+            for href in analysis['links']:
+                absolute_url = normalize_url(urljoin(base_url, href))
+                
+                # Only include same-domain links
+                if self._same_domain(absolute_url):
+                    links.append(absolute_url)
+            
+            # Skip pages whose <link rel="canonical"> was already crawled
+            if self.is_canonical_duplicate(url, analysis['canonical']):
+                print(f"[RecursiveCrawler] Skipping {url} - duplicate of canonical {analysis['canonical']}")
+                return None, links
+            
+            await self.keep_static_html(url, content, base_url, analysis)
+            
+            page_info = PageInfo(
+                url=url,
+                title=analysis['title'],
+                size=len(content),
+                has_images=analysis['has_images'],
+                word_count=analysis['word_count'],
+                status="success"
+            )
+            
+            return page_info, links
         
         except Exception as e:
             print(f"[RecursiveCrawler] ✗ Error fetching page {url}: {e}")
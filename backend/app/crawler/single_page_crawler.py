@@ -2,11 +2,12 @@
 Single page crawler
 """
 
-import aiohttp
 from typing import AsyncIterator
-from bs4 import BeautifulSoup
 
 from app.crawler.base import BaseCrawler
+from app.crawler.canonical import normalize_url
+from app.crawler.page_analyzer import analyze_page
+from app.core.config import settings
 from app.core.models import PageInfo
 
 
@@ -19,10 +20,13 @@ class SinglePageCrawler(BaseCrawler):
         
         Args:
             url: URL to fetch
-            
+        
         Yields:
             PageInfo for the page
         """
+        url = normalize_url(url)
+        self.mark_visited(url)
+        
         page_info = await self._fetch_page(url)
         if page_info:
             yield page_info
@@ -30,40 +34,29 @@ class SinglePageCrawler(BaseCrawler):
     async def _fetch_page(self, url: str) -> PageInfo:
         """Fetch page information"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    headers={"User-Agent": self.user_agent},
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status != 200:
-                        return PageInfo(
-                            url=url,
-                            title=None,
-                            size=0,
-                            has_images=False,
-                            status="failed"
-                        )
-                    
-                    content = await response.text()
-                    
-                    # Parse HTML
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    # Extract information
-                    title = soup.title.string if soup.title else None
-                    has_images = len(soup.find_all('img')) > 0
-                    text = soup.get_text()
-                    word_count = len(text.split())
-                    
-                    return PageInfo(
-                        url=url,
-                        title=title,
-                        size=len(content),
-                        has_images=has_images,
-                        word_count=word_count,
-                        status="success"
-                    )
+            status, content, final_url = await self.fetch(url)
+            if status != 200:
+                return PageInfo(
+                    url=url,
+                    title=None,
+                    size=0,
+                    has_images=False,
+                    status="failed"
+                )
+            
+            # Extract information in one parser pass
+            analysis = analyze_page(content, max_bytes=settings.PAGE_ANALYSIS_MAX_BYTES)
+            
+            await self.keep_static_html(url, content, final_url, analysis)
+            
+            return PageInfo(
+                url=url,
+                title=analysis['title'],
+                size=len(content),
+                has_images=analysis['has_images'],
+                word_count=analysis['word_count'],
+                status="success"
+            )
         
         except Exception as e:
             print(f"Error fetching page {url}: {e}")
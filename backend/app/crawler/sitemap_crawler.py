@@ -2,12 +2,15 @@
 Sitemap-based crawler
 """
 
-import aiohttp
-import xml.etree.ElementTree as ET
 from typing import AsyncIterator
-import gzip
+from contextlib import aclosing
+import asyncio
 
 from app.crawler.base import BaseCrawler
+from app.crawler.canonical import normalize_url
+from app.crawler.page_analyzer import analyze_page
+from app.crawler.sitemap_parser import expand_sitemap
+from app.core.config import settings
 from app.core.models import PageInfo
 
 
@@ -20,140 +23,150 @@ class SitemapCrawler(BaseCrawler):
     
     async def crawl(self, sitemap_url: str) -> AsyncIterator[PageInfo]:
         """
-        Crawl URLs from sitemap
+        Crawl URLs from sitemap with a pool of probe workers
+        
+        URLs are probed as soon as they are parsed from the sitemap stream,
+        so crawling starts on the first <loc> instead of after the download.
+        Child sitemaps of an index are expanded concurrently. Pages are yielded
+        in sitemap order (an index's children in the order they are listed),
+        or in completion order when preserve_order is off.
         
         Args:
             sitemap_url: URL of the sitemap.xml file
-            
+        
         Yields:
             PageInfo for each URL in the sitemap
         """
         print(f"[SitemapCrawler] Starting sitemap crawl: {sitemap_url}")
-        print(f"[SitemapCrawler] Max URLs limit: {self.config.max_urls}")
-        
-        urls = await self._parse_sitemap(sitemap_url, depth=0)
-        print(f"[SitemapCrawler] Found {len(urls)} URLs in sitemap (limited to {min(len(urls), self.config.max_urls)})")
+        print(f"[SitemapCrawler] Max URLs limit: {self.config.max_urls}, Workers: {self.config.concurrency}")
         
         pages_yielded = 0
-        total_urls = min(len(urls), self.config.max_urls)
+        work: asyncio.Queue = asyncio.Queue(maxsize=self.config.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
         
-        for i, url in enumerate(urls[:self.config.max_urls], 1):
-            if not self.should_crawl(url):
-                print(f"[SitemapCrawler] Skipping {url} - filtered by crawl rules")
-                continue
-            
-            self.visited_urls.add(url)
-            
-            # Fetch page info
-            print(f"[SitemapCrawler] Crawling ({i}/{total_urls}): {url}")
-            page_info = await self._fetch_page_info(url)
-            if page_info:
-                pages_yielded += 1
-                print(f"[SitemapCrawler] ✓ Successfully crawled page {pages_yielded}: {page_info.title or url}")
-                yield page_info
+        tasks = [asyncio.create_task(self._produce(sitemap_url, work))]
+        tasks += [
+            asyncio.create_task(self._worker(work, results))
+            for _ in range(self.config.concurrency)
+        ]
+        
+        # Out-of-order results parked until their turn (sitemap order mode)
+        parked = {}
+        next_index = 0
+        workers_done = 0
+        
+        try:
+            while workers_done < self.config.concurrency:
+                item = await results.get()
+                if item is None:
+                    workers_done += 1
+                    continue
+                
+                index, page_info = item
+                if self.config.preserve_order:
+                    parked[index] = page_info
+                    ready = []
+                    while next_index in parked:
+                        ready.append(parked.pop(next_index))
+                        next_index += 1
+                else:
+                    ready = [page_info]
+                
+                for page_info in ready:
+                    if page_info:
+                        pages_yielded += 1
+                        print(f"[SitemapCrawler] ✓ Successfully crawled page {pages_yielded}: {page_info.title or page_info.url}")
+                        yield page_info
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
         print(f"[SitemapCrawler] Crawl complete. Total pages: {pages_yielded}")
     
-    async def _parse_sitemap(self, sitemap_url: str, depth: int = 0) -> list:
-        """Parse sitemap and extract URLs"""
-        urls = []
-        
-        # Prevent infinite recursion
-        if depth > self.max_recursion_depth:
-            print(f"[SitemapCrawler] Max recursion depth reached for {sitemap_url}")
-            return urls
+    async def _produce(self, sitemap_url: str, work: asyncio.Queue):
+        """Feed deduplicated sitemap URLs to the workers in sitemap order"""
+        index = 0
+        urls = expand_sitemap(
+            sitemap_url,
+            self.user_agent,
+            max_depth=self.max_recursion_depth,
+            before_fetch=self._throttle,
+            on_error=self._sitemap_failed,
+            ordered=self.config.preserve_order
+        )
         
         try:
-            print(f"[SitemapCrawler] Fetching sitemap (depth {depth}): {sitemap_url}")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    sitemap_url,
-                    headers={"User-Agent": self.user_agent},
-                    timeout=aiohttp.ClientTimeout(total=30)  # Add 30 second timeout
-                ) as response:
-                    if response.status != 200:
-                        print(f"[SitemapCrawler] Sitemap returned status {response.status}: {sitemap_url}")
-                        return urls
-                    
-                    content = await response.read()
-                    print(f"[SitemapCrawler] Downloaded {len(content):,} bytes from sitemap")
+            async with aclosing(urls):
+                async for url in urls:
+                    if len(self.visited_urls) >= self.config.max_urls:
+                        print(f"[SitemapCrawler] Reached max URLs limit: {self.config.max_urls}")
+                        break
                     
-                    # Handle gzipped sitemaps
-                    if sitemap_url.endswith('.gz'):
-                        content = gzip.decompress(content)
+                    url = normalize_url(url)
+                    if not self.should_crawl(url):
+                        print(f"[SitemapCrawler] Skipping {url} - filtered by crawl rules")
+                        continue
                     
-                    # Parse XML
-                    root = ET.fromstring(content)
-                    namespaces = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-                    
-                    # Check if it's a sitemap index
-                    sitemaps = root.findall('.//ns:sitemap/ns:loc', namespaces)
-                    if sitemaps:
-                        print(f"[SitemapCrawler] Found {len(sitemaps)} child sitemaps in index")
-                        # Limit number of child sitemaps to prevent hanging
-                        max_child_sitemaps = 10
-                        for idx, sitemap_elem in enumerate(sitemaps[:max_child_sitemaps], 1):
-                            try:
-                                print(f"[SitemapCrawler] Processing child sitemap {idx}/{min(len(sitemaps), max_child_sitemaps)}...")
-                                child_urls = await self._parse_sitemap(sitemap_elem.text, depth + 1)
-                                urls.extend(child_urls)
-                                print(f"[SitemapCrawler] Collected {len(urls)} total URLs so far")
-                                # Stop if we have enough URLs
-                                if len(urls) >= self.config.max_urls:
-                                    print(f"[SitemapCrawler] Reached max URLs limit: {self.config.max_urls}")
-                                    break
-                            except Exception as e:
-                                print(f"[SitemapCrawler] Error parsing child sitemap {sitemap_elem.text}: {e}")
-                                continue
-                    else:
-                        # Extract URLs from regular sitemap
-                        url_elements = root.findall('.//ns:url/ns:loc', namespaces)
-                        urls = [elem.text for elem in url_elements if elem.text]
-                        print(f"[SitemapCrawler] Extracted {len(urls)} URLs from sitemap")
-        
-        except asyncio.TimeoutError:
-            print(f"[SitemapCrawler] ✗ Timeout fetching sitemap {sitemap_url}")
+                    self.mark_visited(url)
+                    await work.put((index, url))
+                    index += 1
         except Exception as e:
-            print(f"[SitemapCrawler] ✗ Error parsing sitemap {sitemap_url}: {e}")
+            print(f"[SitemapCrawler] ✗ Error reading sitemap {sitemap_url}: {e}")
+            self.warnings.append(f"Error reading sitemap {sitemap_url}: {e}")
         
-        return urls[:self.config.max_urls]  # Limit total URLs
+        # One stop signal per worker
+        for _ in range(self.config.concurrency):
+            await work.put(None)
+    
+    async def _worker(self, work: asyncio.Queue, results: asyncio.Queue):
+        """Probe URLs from the work queue until told to stop"""
+        while True:
+            item = await work.get()
+            if item is None:
+                results.put_nowait(None)
+                return
+            
+            index, url = item
+            page_info = None
+            try:
+                print(f"[SitemapCrawler] Crawling ({index + 1}/{self.config.max_urls}): {url}")
+                page_info = await self._fetch_page_info(url)
+            except Exception as e:
+                print(f"[SitemapCrawler] ✗ Worker error on {url}: {e}")
+            results.put_nowait((index, page_info))
+    
+    async def _throttle(self, url: str):
+        """Wait for the host's rate limiter before a sitemap request"""
+        await self.rate_limiter.acquire(url, self.config.request_delay)
+    
+    def _sitemap_failed(self, url: str, reason: str):
+        """Record a sitemap whose URLs are missing from the crawl"""
+        self.warnings.append(f"{reason}: {url} - its pages may be missing")
     
     async def _fetch_page_info(self, url: str) -> PageInfo:
         """Fetch basic information about a page"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    headers={"User-Agent": self.user_agent},
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status == 200:
-                        content = await response.text()
-                        
-                        # Extract title
-                        title = None
-                        import re
-                        title_match = re.search(r'<title[^>]*>([^<]+)</title>', content, re.IGNORECASE)
-                        if title_match:
-                            title = title_match.group(1).strip()
-                        
-                        # Check for images
-                        has_images = '<img' in content.lower()
-                        
-                        # Estimate word count (rough)
-                        from bs4 import BeautifulSoup
-                        soup = BeautifulSoup(content, 'html.parser')
-                        text = soup.get_text()
-                        word_count = len(text.split())
-                        
-                        return PageInfo(
-                            url=url,
-                            title=title,
-                            size=len(content),
-                            has_images=has_images,
-                            word_count=word_count,
-                            status="success"
-                        )
+            status, content, final_url = await self.fetch(url)
+            if status == 200:
+                # Title, images and word count in one parser pass
+                analysis = analyze_page(content, max_bytes=settings.PAGE_ANALYSIS_MAX_BYTES)
+                
+                # Skip pages whose <link rel="canonical"> was already crawled
+                if self.is_canonical_duplicate(url, analysis['canonical']):
+                    print(f"[SitemapCrawler] Skipping {url} - duplicate of canonical {analysis['canonical']}")
+                    return None
+                
+                await self.keep_static_html(url, content, final_url, analysis)
+                
+                return PageInfo(
+                    url=url,
+                    title=analysis['title'],
+                    size=len(content),
+                    has_images=analysis['has_images'],
+                    word_count=analysis['word_count'],
+                    status="success"
+                )
         except Exception as e:
             print(f"[SitemapCrawler] ✗ Error fetching page info for {url}: {e}")
             return PageInfo(
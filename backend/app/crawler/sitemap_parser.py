@@ -0,0 +1,396 @@
+"""
+Streaming sitemap parser
+"""
+
+import asyncio
+import tempfile
+import zlib
+import xml.etree.ElementTree as ET
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional, Tuple
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.http_client import http_client
+
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+RESULT_QUEUE_SIZE = 1000  # Parsed URLs kept in memory; the rest wait in a spill file
+
+# Entry kinds yielded by the parser
+URL_ENTRY = 'url'
+SITEMAP_ENTRY = 'sitemap'
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapStreamParser:
+    """
+    Incremental <urlset>/<sitemapindex> parser
+
+    Feed it raw (optionally gzipped) bytes as they arrive; it decompresses on
+    the fly and returns (kind, loc) entries for every completed <url> or
+    <sitemap> element. Parsed elements are discarded immediately, so memory
+    stays flat regardless of sitemap size.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._decompressor = None
+        self._head = b''  # Bytes held back until the format can be told
+        self._started = False
+        self._root = None
+
+    def feed(self, chunk: bytes) -> list:
+        """
+        Feed a chunk of the response body
+
+        Returns:
+            List of (kind, loc) tuples completed by this chunk
+        """
+        if not self._started:
+            # Gzipped sitemaps (.xml.gz) are detected by magic bytes, not by
+            # name, so hold the body back until both bytes have arrived
+            chunk = self._head + chunk
+            if len(chunk) < len(GZIP_MAGIC):
+                self._head = chunk
+                return []
+            self._head = b''
+            self._started = True
+            if chunk[:2] == GZIP_MAGIC:
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+
+        self._parser.feed(chunk)
+        return self._read_entries()
+
+    def close(self) -> list:
+        """Flush remaining data and return the final entries"""
+        if self._head:
+            # Bodies shorter than the gzip magic can only be (broken) XML
+            self._parser.feed(self._head)
+            self._head = b''
+        if self._decompressor is not None:
+            self._parser.feed(self._decompressor.flush())
+        entries = self._read_entries()
+        self._parser.close()
+        return entries
+
+    def _read_entries(self) -> list:
+        entries = []
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                continue
+
+            name = _local_name(elem.tag)
+            if name not in (URL_ENTRY, SITEMAP_ENTRY):
+                continue
+
+            for child in elem:
+                if _local_name(child.tag) == 'loc' and child.text and child.text.strip():
+                    entries.append((name, child.text.strip()))
+                    break
+
+            # Drop processed elements so the tree never grows
+            elem.clear()
+            if self._root is not None:
+                self._root.clear()
+        return entries
+
+
+class SitemapError(Exception):
+    """A sitemap could not be fetched or was cut off"""
+
+
+class SpillQueue:
+    """
+    FIFO of URLs that never blocks the producer
+
+    Up to `memory_size` URLs are kept in memory. Once that is full, further
+    URLs are appended to an anonymous temporary file and read back in
+    batches in the same order. That way a sitemap response is read at
+    network speed no matter how slowly the crawl consumes it. File access
+    is sequential and buffered, and the file is only created for sitemaps
+    larger than the memory buffer.
+    """
+
+    def __init__(self, memory_size: int = RESULT_QUEUE_SIZE):
+        self.memory_size = memory_size
+        self._memory: Deque[str] = deque()
+        self._file = None
+        self._read_pos = 0
+        self._spilled = 0  # URLs in the file not read back yet
+        self._closed = False
+        self._changed = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._memory) + self._spilled
+
+    def put(self, url: str):
+        """Append a URL"""
+        if self._spilled == 0 and len(self._memory) < self.memory_size:
+            self._memory.append(url)
+        else:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile()
+            self._file.seek(0, 2)
+            self._file.write(url.encode('utf-8') + b'\n')
+            self._spilled += 1
+        self._changed.set()
+
+    def close(self):
+        """Mark the end of the stream; get() returns None once drained"""
+        self._closed = True
+        self._changed.set()
+
+    async def get(self) -> Optional[str]:
+        """Remove the oldest URL, waiting for one; None after close() and drain"""
+        while not self._memory and not self._spilled:
+            if self._closed:
+                return None
+            self._changed.clear()
+            await self._changed.wait()
+
+        if not self._memory:
+            self._refill()
+        url = self._memory.popleft()
+        self._changed.set()
+        return url
+
+    def discard(self):
+        """Drop everything and delete the spill file"""
+        self._memory.clear()
+        self._spilled = 0
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _refill(self):
+        count = min(self.memory_size, self._spilled)
+        self._file.seek(self._read_pos)
+        for _ in range(count):
+            self._memory.append(self._file.readline().rstrip(b'\n').decode('utf-8'))
+        self._spilled -= count
+        self._read_pos = self._file.tell()
+        if self._spilled == 0:
+            # Everything was read back; reuse the file from the start
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_pos = 0
+
+
+async def stream_sitemap(
+    sitemap_url: str,
+    user_agent: str,
+    timeout: float = settings.REQUEST_TIMEOUT
+) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Fetch a sitemap and yield its entries as they are parsed from the socket
+
+    Args:
+        sitemap_url: URL of the sitemap (plain or gzipped)
+        user_agent: User-Agent header to send
+        timeout: Connect and per-read timeout in seconds
+
+    Yields:
+        (kind, loc) tuples where kind is 'url' or 'sitemap'
+
+    Raises:
+        SitemapError: If the sitemap did not return 200
+        ET.ParseError: If the document is not valid XML (or was cut off)
+    """
+    session = http_client.session
+    async with session.get(
+        sitemap_url,
+        headers={"User-Agent": user_agent},
+        # No total timeout: large sitemaps take a while to stream
+        timeout=aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=timeout,
+            sock_read=timeout
+        )
+    ) as response:
+        if response.status != 200:
+            raise SitemapError(f"status {response.status}")
+
+        parser = SitemapStreamParser()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            for entry in parser.feed(chunk):
+                yield entry
+        for entry in parser.close():
+            yield entry
+
+
+class _Sitemap:
+    """A sitemap being expanded, with its URLs and child sitemaps in document order"""
+
+    def __init__(self, url: str, depth: int, urls: SpillQueue):
+        self.url = url
+        self.depth = depth
+        self.urls = urls
+        self.children: List['_Sitemap'] = []
+        self.wanted = False  # The caller is waiting for this sitemap's URLs
+
+
+async def expand_sitemap(
+    sitemap_url: str,
+    user_agent: str,
+    max_urls: Optional[int] = None,
+    fanout: int = settings.SITEMAP_FANOUT,
+    max_depth: int = 3,
+    timeout: float = settings.REQUEST_TIMEOUT,
+    before_fetch: Optional[Callable[[str], Awaitable]] = None,
+    on_error: Optional[Callable[[str, str], None]] = None,
+    ordered: bool = False
+) -> AsyncIterator[str]:
+    """
+    Yield page URLs from a sitemap, expanding sitemap indexes concurrently
+
+    Child sitemaps are streamed by up to `fanout` tasks at once. By default
+    their URLs are merged into one stream as they are parsed, so output
+    follows completion order. With `ordered`, each sitemap's URLs are kept
+    apart and yielded in document order: an index's children in the order
+    they are listed, each child's URLs in the order they appear in it.
+    Expansion stops as soon as `max_urls` URLs have been yielded (or the
+    caller stops iterating), so with `ordered` the same URLs are picked
+    whichever child sitemap answers first.
+
+    Downloads don't wait for the caller: a sitemap that has started is read
+    to the end at network speed, with URLs the caller hasn't taken yet parked
+    in SpillQueues. Otherwise a slow crawl would leave the connection idle
+    until the server gave up on it. New child sitemaps are only requested
+    while that backlog is below RESULT_QUEUE_SIZE, so no connection is held
+    open while waiting. The sitemap the caller is waiting for is always
+    requested, so an ordered expansion can't stall behind later ones.
+
+    Args:
+        sitemap_url: URL of the sitemap or sitemap index
+        user_agent: User-Agent header to send
+        max_urls: Stop after this many URLs (None for no limit)
+        fanout: Maximum number of sitemaps fetched concurrently
+        max_depth: Maximum sitemap index nesting depth
+        timeout: Connect and per-read timeout in seconds
+        before_fetch: Optional coroutine function awaited before each sitemap
+            request (e.g. a rate limiter)
+        on_error: Optional callback with (sitemap URL, reason) for each
+            sitemap that failed or was cut off, so its URLs are missing
+        ordered: Yield URLs in sitemap order instead of completion order
+
+    Yields:
+        Page URLs (<url><loc> values)
+    """
+    shared = None if ordered else SpillQueue()
+    semaphore = asyncio.Semaphore(fanout)
+    tasks = set()
+    sitemaps: List[_Sitemap] = []
+    active = 0
+    backlog = 0  # URLs parsed but not taken by the caller yet
+    room = asyncio.Event()
+
+    def has_room(sitemap: _Sitemap) -> bool:
+        return sitemap.wanted or backlog < RESULT_QUEUE_SIZE
+
+    async def start(sitemap: _Sitemap):
+        # Take a fetch slot once there is room for more URLs; the check is
+        # repeated with the slot held, as others may have filled it meanwhile
+        while True:
+            while not has_room(sitemap):
+                room.clear()
+                await room.wait()
+            await semaphore.acquire()
+            if has_room(sitemap):
+                return
+            semaphore.release()
+
+    def report(url: str, reason: str):
+        print(f"[SitemapParser] ✗ {reason}: {url}")
+        if on_error is not None:
+            on_error(url, reason)
+
+    async def expand(sitemap: _Sitemap):
+        nonlocal active, backlog
+        url, depth = sitemap.url, sitemap.depth
+        url_count = 0
+        try:
+            await start(sitemap)
+            try:
+                if before_fetch is not None:
+                    await before_fetch(url)
+                print(f"[SitemapParser] Fetching sitemap (depth {depth}): {url}")
+                async for kind, loc in stream_sitemap(url, user_agent, timeout=timeout):
+                    if kind == SITEMAP_ENTRY:
+                        if depth < max_depth:
+                            sitemap.children.append(schedule(loc, depth + 1))
+                        else:
+                            print(f"[SitemapParser] Max recursion depth reached for {loc}")
+                    else:
+                        url_count += 1
+                        backlog += 1
+                        sitemap.urls.put(loc)
+            finally:
+                semaphore.release()
+            if url_count:
+                print(f"[SitemapParser] Extracted {url_count} URLs from {url}")
+        except asyncio.CancelledError:
+            active -= 1
+            raise
+        except asyncio.TimeoutError:
+            report(url, f"Timeout reading sitemap after {url_count} URLs")
+        except SitemapError as e:
+            report(url, f"Sitemap request failed ({e})")
+        except Exception as e:
+            report(url, f"Sitemap cut off after {url_count} URLs ({e})")
+
+        active -= 1
+        if ordered:
+            sitemap.urls.close()
+        elif active == 0:
+            # Every sitemap has been fully expanded
+            shared.close()
+
+    def schedule(url: str, depth: int) -> _Sitemap:
+        nonlocal active
+        sitemap = _Sitemap(url, depth, SpillQueue() if ordered else shared)
+        sitemaps.append(sitemap)
+        active += 1
+        task = asyncio.create_task(expand(sitemap))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return sitemap
+
+    # Sitemaps still to be read by the caller, next one last. Unordered, the
+    # root's queue carries every URL and this never grows.
+    pending = [schedule(sitemap_url, 0)]
+    yielded = 0
+
+    try:
+        while pending and (max_urls is None or yielded < max_urls):
+            sitemap = pending.pop()
+            sitemap.wanted = True
+            room.set()
+            while max_urls is None or yielded < max_urls:
+                loc = await sitemap.urls.get()
+                if loc is None:
+                    break
+                backlog -= 1
+                room.set()
+                yielded += 1
+                yield loc
+            if ordered:
+                # Its children are all known once its own URLs are drained
+                sitemap.urls.discard()
+                pending.extend(reversed(sitemap.children))
+    finally:
+        for task in list(tasks):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for sitemap in sitemaps:
+            sitemap.urls.discard()
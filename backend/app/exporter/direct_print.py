@@ -0,0 +1,105 @@
+"""
+In-page content clean-up for printing a live page directly
+"""
+
+from typing import Dict
+
+from playwright.async_api import Page
+
+from app.renderer.content_renderer import (
+    IMAGE_STYLE, LINK_STYLE, MAIN_CONTENT_SELECTORS, REMOVED_ELEMENTS
+)
+
+# Same clean-up ContentRenderer does with BeautifulSoup, done on the live DOM:
+# drop page chrome, keep the main content under a page title, make links
+# absolute, and replace the site's stylesheets with the export styles
+CLEAN_PAGE_SCRIPT = """
+({ removedElements, contentSelectors, includeImages, imageStyle, linkStyle, styles, coverHtml }) => {
+    const size = document.documentElement.outerHTML.length;
+    const title = document.title || null;
+
+    document.querySelectorAll(removedElements.join(',')).forEach((element) => element.remove());
+
+    let root = null;
+    for (const selector of contentSelectors) {
+        root = document.querySelector(selector);
+        if (root) break;
+    }
+
+    const images = root ? root.querySelectorAll('img') : document.body.querySelectorAll('img');
+    const imageCount = images.length;
+    images.forEach((img) => {
+        if (!includeImages || !img.getAttribute('src')) {
+            img.remove();
+            return;
+        }
+        // Load everything before printing, not only what is in the viewport
+        img.loading = 'eager';
+        img.removeAttribute('data-src');
+        if (!img.getAttribute('alt')) img.setAttribute('alt', 'Image');
+        img.setAttribute('style', imageStyle);
+    });
+
+    const content = document.createElement('div');
+    content.className = 'page-content';
+    content.id = 'page-1';
+    const heading = document.createElement('h1');
+    heading.className = 'page-title';
+    heading.textContent = title || 'Page 1';
+    content.append(heading);
+    if (root) {
+        content.append(root);
+    } else {
+        content.append(...document.body.childNodes);
+    }
+
+    content.querySelectorAll('a[href]').forEach((link) => {
+        link.setAttribute('href', link.href);
+        link.setAttribute('style', linkStyle);
+        if (!link.textContent.trim()) link.textContent = link.href;
+    });
+
+    document.querySelectorAll('link[rel~="stylesheet"], style').forEach((element) => element.remove());
+    const style = document.createElement('style');
+    style.textContent = styles;
+    document.head.append(style);
+
+    document.body.replaceChildren();
+    for (const attribute of Array.from(document.body.attributes)) {
+        document.body.removeAttribute(attribute.name);
+    }
+    document.body.insertAdjacentHTML('afterbegin', coverHtml);
+    document.body.append(content);
+
+    return {
+        title,
+        size,
+        has_images: imageCount > 0,
+        word_count: (content.innerText || '').split(/\\s+/).filter(Boolean).length
+    };
+}
+"""
+
+
+async def clean_live_page(page: Page, include_images: bool, styles: str, cover_html: str = '') -> Dict:
+    """
+    Turn a loaded page into the export layout in place
+
+    Args:
+        page: Page after navigation, with its content settled
+        include_images: Keep the content's images
+        styles: Export stylesheet replacing the site's CSS
+        cover_html: Cover page markup to put before the content
+
+    Returns:
+        Dict with the original 'title', HTML 'size', 'has_images' and 'word_count'
+    """
+    return await page.evaluate(CLEAN_PAGE_SCRIPT, {
+        'removedElements': REMOVED_ELEMENTS,
+        'contentSelectors': MAIN_CONTENT_SELECTORS,
+        'includeImages': include_images,
+        'imageStyle': IMAGE_STYLE,
+        'linkStyle': LINK_STYLE,
+        'styles': styles,
+        'coverHtml': cover_html
+    })
@@ -0,0 +1,70 @@
+"""
+Deduplicated image files for export documents
+"""
+
+import base64
+import hashlib
+import os
+import re
+from typing import Dict
+
+# src="data:image/png;base64,..." as written by ContentRenderer
+DATA_URI_SRC = re.compile(r'''src=(["'])data:image/([\w.+-]+);base64,([A-Za-z0-9+/=\s]+)\1''')
+
+EXTENSIONS = {
+    'jpeg': 'jpg',
+    'svg+xml': 'svg',
+    'x-icon': 'ico',
+    'vnd.microsoft.icon': 'ico'
+}
+
+
+class ImageAssets:
+    """
+    Writes inlined images out as files, once per unique image
+
+    Rendered pages carry their images as base64 data URIs. Before pages are
+    combined into one document, each data URI is replaced with a relative
+    reference to a file in `asset_dir`, named by the hash of its data, so an
+    image repeated on every page is stored and loaded once.
+    """
+
+    def __init__(self, asset_dir: str, url_prefix: str = 'assets/'):
+        self.asset_dir = asset_dir
+        self.url_prefix = url_prefix
+        self.references = 0
+        self.bytes_written = 0
+        self._files: Dict[str, str] = {}  # Hash of base64 data -> file name
+
+    @property
+    def unique(self) -> int:
+        """Number of distinct images written"""
+        return len(self._files)
+
+    def externalize(self, html: str) -> str:
+        """Replace data URI image sources in HTML with asset file references"""
+        return DATA_URI_SRC.sub(self._replace, html)
+
+    def _replace(self, match: re.Match) -> str:
+        quote, subtype, data = match.groups()
+        self.references += 1
+
+        key = hashlib.sha256(data.encode('ascii')).hexdigest()
+        name = self._files.get(key)
+        if name is None:
+            subtype = subtype.lower()
+            name = f"{key[:32]}.{EXTENSIONS.get(subtype, subtype)}"
+            try:
+                content = base64.b64decode(data)
+            except ValueError:
+                # Leave undecodable data URIs inline
+                self.references -= 1
+                return match.group(0)
+
+            os.makedirs(self.asset_dir, exist_ok=True)
+            with open(os.path.join(self.asset_dir, name), 'wb') as f:
+                f.write(content)
+            self.bytes_written += len(content)
+            self._files[key] = name
+
+        return f'src={quote}{self.url_prefix}{name}{quote}'
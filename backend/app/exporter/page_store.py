@@ -0,0 +1,107 @@
+"""
+On-disk store of rendered pages for export
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from app.exporter.image_assets import ImageAssets
+
+READ_CHUNK_SIZE = 256 * 1024
+
+
+class PageStore:
+    """
+    Rendered pages kept on disk between rendering and export
+
+    Each page's HTML is written to its own file as soon as the page is
+    rendered, with its inlined images written out once each to the shared
+    assets directory, and is then dropped from memory. Only the title, URL
+    and metadata of a page stay in memory, so peak memory doesn't grow with
+    the size of the document. Export documents are assembled from the page
+    files in crawl order inside `build_dir`, where the relative image
+    references resolve.
+    """
+
+    def __init__(self, parent_dir: str, count: int):
+        os.makedirs(parent_dir, exist_ok=True)
+        self.build_dir = tempfile.mkdtemp(prefix='.build-', dir=parent_dir)
+        self.assets = ImageAssets(os.path.join(self.build_dir, 'assets'))
+        self.html_size = 0  # Bytes of page HTML written
+        self._entries: List[Optional[Dict]] = [None] * count
+        self._lock = threading.Lock()
+
+    @property
+    def pages(self) -> List[Dict]:
+        """
+        Stored pages in crawl order
+
+        Dicts with 'title', 'url', 'metadata' and 'html_path' (the page's
+        HTML file); exporters accept them in place of pages carrying 'html'.
+        """
+        return [entry for entry in self._entries if entry is not None]
+
+    def add(self, index: int, url: str, rendered: Dict):
+        """
+        Write a rendered page to disk (blocking; run it in the executor)
+
+        Args:
+            index: Position of the page in crawl order
+            url: URL the page was crawled from
+            rendered: Result of ContentRenderer.render_page / render_static
+        """
+        with self._lock:
+            html = self.assets.externalize(rendered.get('html', ''))
+            html_path = os.path.join(self.build_dir, 'pages', f"{index + 1:06d}.html")
+            os.makedirs(os.path.dirname(html_path), exist_ok=True)
+            with open(html_path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            self.html_size += len(html)
+
+        self._entries[index] = {
+            'title': rendered.get('title'),
+            'url': url,
+            'metadata': rendered.get('metadata', {}),
+            'html_path': html_path
+        }
+
+    def copy_to(self, output_dir: str):
+        """
+        Copy the pages as page_<n>.html files plus their images (blocking)
+
+        Used for the HTML export when PDF generation fails.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        for i, page in enumerate(self.pages):
+            shutil.copyfile(page['html_path'], os.path.join(output_dir, f"page_{i + 1}.html"))
+        if os.path.isdir(self.assets.asset_dir):
+            shutil.copytree(self.assets.asset_dir, os.path.join(output_dir, 'assets'), dirs_exist_ok=True)
+
+    def cleanup(self):
+        """Delete the build directory"""
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+
+
+def iter_page_html(page: Dict, assets: Optional[ImageAssets] = None) -> Iterator[str]:
+    """
+    Generate a page's HTML, reading it from disk for stored pages
+
+    Pages with an 'html_path' (from PageStore) are read back in chunks.
+    In-memory pages have their inlined images written out with `assets`
+    when it is given.
+    """
+    html_path = page.get('html_path')
+    if html_path is None:
+        html = page.get('html', '')
+        yield assets.externalize(html) if assets is not None else html
+        return
+
+    with open(html_path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
@@ -12,10 +12,14 @@ except Exception as e:
     HTML = None
     CSS = None
 
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 import os
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.process_pool import ProcessPool
+from app.exporter.page_store import iter_page_html
+
 
 class PDFExporter:
     """Export content to PDF"""
@@ -35,17 +39,21 @@ class PDFExporter:
         output_filename: str,
         include_toc: bool = True,
         include_cover: bool = True,
-        custom_title: str = None
+        custom_title: str = None,
+        build_dir: Optional[str] = None
     ) -> str:
         """
         Export pages to PDF
         
         Args:
-            pages: List of page dicts with 'title', 'html', 'url', 'metadata'
+            pages: List of page dicts with 'title', 'url', 'metadata' and
+                either 'html' or 'html_path' (PageStore.pages)
             output_filename: Output PDF filename
             include_toc: Include table of contents
             include_cover: Include cover page
             custom_title: Custom document title
+            build_dir: Directory of the stored pages (PageStore.build_dir);
+                the HTML document is written there and loaded from disk
             
         Returns:
             Path to generated PDF
@@ -64,31 +72,40 @@ class PDFExporter:
             )
         
         # Build HTML document
-        html_content = self._build_html(
+        parts = self._iter_html(
             pages,
             include_toc=include_toc,
             include_cover=include_cover,
             custom_title=custom_title
         )
+        if build_dir:
+            # Next to the stored pages' images, which it references relatively
+            html_path = os.path.join(build_dir, 'weasyprint.html')
+            with open(html_path, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    f.write(part)
+            document = HTML(filename=html_path)
+        else:
+            document = HTML(string=''.join(parts))
         
         # Generate PDF
         output_path = os.path.join(self.output_dir, output_filename)
         
-        HTML(string=html_content).write_pdf(
+        document.write_pdf(
             output_path,
             stylesheets=[CSS(string=self._get_pdf_styles())]
         )
         
         return output_path
     
-    def _build_html(
+    def _iter_html(
         self,
         pages: List[Dict],
         include_toc: bool,
         include_cover: bool,
         custom_title: str
-    ) -> str:
-        """Build complete HTML document"""
+    ) -> Iterator[str]:
+        """Generate the complete HTML document, one part per page"""
         html_parts = ['<!DOCTYPE html><html><head><meta charset="UTF-8">']
         
         title = custom_title or pages[0]['title'] if pages else 'DocForge Export'
@@ -102,21 +119,20 @@ class PDFExporter:
         # Table of contents
         if include_toc and len(pages) > 1:
             html_parts.append(self._generate_toc(pages))
+        yield ''.join(html_parts)
         
         # Content pages
         for i, page in enumerate(pages, 1):
-            html_parts.append(f'<div class="page" id="page-{i}">')
-            html_parts.append(f'<h1 class="page-title">{page["title"]}</h1>')
-            html_parts.append(page['html'])
-            html_parts.append(f'<div class="page-footer">')
+            yield f'<div class="page" id="page-{i}"><h1 class="page-title">{page["title"]}</h1>'
+            yield from iter_page_html(page)
+            html_parts = [f'<div class="page-footer">']
             html_parts.append(f'<span>{page["metadata"]["url"]}</span>')
             html_parts.append(f'<span>Page {i}</span>')
             html_parts.append('</div>')
             html_parts.append('</div>')
+            yield ''.join(html_parts)
         
-        html_parts.append('</body></html>')
-        
-        return ''.join(html_parts)
+        yield '</body></html>'
     
     def _generate_cover_page(self, title: str, pages: List[Dict]) -> str:
         """Generate cover page HTML"""
@@ -269,3 +285,39 @@ class PDFExporter:
             font-weight: bold;
         }
         '''
+
+
+def export_pdf(
+    output_dir: str,
+    pages: List[Dict],
+    output_filename: str,
+    include_toc: bool = True,
+    include_cover: bool = True,
+    custom_title: str = None,
+    build_dir: Optional[str] = None
+) -> str:
+    """
+    Export pages to PDF with WeasyPrint
+
+    Entry point for the WeasyPrint process pool, so it must stay a picklable
+    module-level function.
+
+    Returns:
+        Path to generated PDF
+    """
+    return PDFExporter(output_dir).export(
+        pages,
+        output_filename,
+        include_toc=include_toc,
+        include_cover=include_cover,
+        custom_title=custom_title,
+        build_dir=build_dir
+    )
+
+
+# Global process pool for WeasyPrint layout, which is CPU-bound and would
+# otherwise hold the GIL of the API process
+weasyprint_pool = ProcessPool(
+    'WeasyPrint',
+    max_workers=settings.WEASYPRINT_WORKERS or os.cpu_count() or 1
+)
@@ -0,0 +1,134 @@
+"""
+Merging of separately printed PDF chunks into one document
+"""
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, FloatObject, NameObject, NullObject, PdfObject
+    PYPDF_AVAILABLE = True
+    PYPDF_ERROR = None
+except Exception as e:
+    PYPDF_AVAILABLE = False
+    PYPDF_ERROR = str(e)
+
+from typing import Dict, List, Optional, Tuple
+
+
+def merge_pdf_chunks(
+    chunk_paths: List[str],
+    output_path: str,
+    outline: List[Tuple[str, str]],
+    title: Optional[str] = None
+) -> int:
+    """
+    Concatenate chunk PDFs and reconnect links and outline across them
+
+    Chromium writes links to `#anchor` targets as named destinations that
+    only resolve inside the chunk that was printed. After the pages are
+    concatenated, every link is pointed at an explicit page of the merged
+    document instead, looking the anchor up across all chunks, so the
+    table of contents in the first chunk reaches pages printed in the others.
+
+    Args:
+        chunk_paths: Chunk PDFs in document order
+        output_path: Where to write the merged PDF
+        outline: (anchor name, title) per document outline entry, in order
+        title: Document title for the PDF metadata
+
+    Returns:
+        Number of pages in the merged PDF
+    """
+    if not PYPDF_AVAILABLE:
+        raise RuntimeError(f"PDF merging is not available: {PYPDF_ERROR}")
+
+    writer = PdfWriter()
+    destinations: Dict[str, Tuple[int, list]] = {}  # Anchor -> (page index, /XYZ position)
+    chunk_ranges = []
+    # pypdf tracks copied objects per reader object, so readers must stay
+    # alive until the merged file is written
+    readers = []
+
+    for path in chunk_paths:
+        reader = PdfReader(path)
+        readers.append(reader)
+        offset = len(writer.pages)
+        local = {}
+        for name, dest in reader.named_destinations.items():
+            page_number = reader.get_destination_page_number(dest)
+            if page_number is None or page_number < 0:
+                continue
+            local[str(name).lstrip('/')] = (offset + page_number, [dest.left, dest.top])
+
+        for page in reader.pages:
+            writer.add_page(page)
+
+        # The front matter is printed first and only holds placeholders for
+        # the page anchors, so later chunks' definitions take precedence
+        destinations.update(local)
+        chunk_ranges.append((offset, len(writer.pages), local))
+
+    for start, end, local in chunk_ranges:
+        for index in range(start, end):
+            _relink_page(writer, index, destinations, local)
+
+    for name, entry_title in outline:
+        target = destinations.get(name)
+        if target is not None:
+            writer.add_outline_item(entry_title, target[0])
+
+    if title:
+        writer.add_metadata({'/Title': title})
+    writer.page_mode = '/UseOutlines'
+
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+    return len(writer.pages)
+
+
+def _relink_page(writer: 'PdfWriter', index: int, destinations: Dict, local: Dict):
+    """Replace named-destination links on a page with explicit page targets"""
+    page = writer.pages[index]
+    annots = page.get('/Annots')
+    if annots is None:
+        return
+
+    kept = ArrayObject()
+    for ref in annots.get_object():
+        annot = ref.get_object()
+        if annot.get('/Subtype') != '/Link':
+            kept.append(ref)
+            continue
+
+        name = annot.get('/Dest')
+        action = annot.get('/A')
+        if name is None and action is not None and action.get('/S') == '/GoTo':
+            name = action.get('/D')
+        if name is None or isinstance(name, ArrayObject):
+            # External URI or an already explicit destination
+            kept.append(ref)
+            continue
+
+        name = str(name).lstrip('/')
+        target = destinations.get(name) if name.startswith('page-') else local.get(name)
+        if target is None:
+            # Link to an anchor that didn't make it into any chunk
+            continue
+
+        page_index, (left, top) = target
+        annot[NameObject('/Dest')] = ArrayObject([
+            writer.pages[page_index].indirect_reference,
+            NameObject('/XYZ'),
+            _coordinate(left),
+            _coordinate(top),
+            NullObject()
+        ])
+        if '/A' in annot:
+            del annot['/A']
+        kept.append(ref)
+
+    page[NameObject('/Annots')] = kept
+
+
+def _coordinate(value) -> 'PdfObject':
+    """A destination coordinate, or null to keep the viewer's current one"""
+    return FloatObject(value) if isinstance(value, (int, float)) else NullObject()
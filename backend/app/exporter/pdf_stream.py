@@ -0,0 +1,109 @@
+"""
+Streamed PDF printing over the DevTools protocol
+"""
+
+import base64
+import re
+from typing import Callable, Dict, Optional
+
+from playwright.async_api import Page
+
+from app.core.config import settings
+
+# Paper sizes in inches, as accepted by page.pdf(format=...)
+PAPER_FORMATS = {
+    'letter': (8.5, 11),
+    'legal': (8.5, 14),
+    'tabloid': (11, 17),
+    'ledger': (17, 11),
+    'a0': (33.1, 46.8),
+    'a1': (23.4, 33.1),
+    'a2': (16.54, 23.4),
+    'a3': (11.7, 16.54),
+    'a4': (8.27, 11.7),
+    'a5': (5.83, 8.27),
+    'a6': (4.13, 5.83)
+}
+
+UNITS_PER_INCH = {'in': 1, 'cm': 2.54, 'mm': 25.4, 'px': 96}
+
+
+def _inches(value) -> float:
+    """Convert a page.pdf() length ('10mm', '1in', 96) to inches"""
+    if isinstance(value, (int, float)):
+        return value / UNITS_PER_INCH['px']
+    match = re.fullmatch(r'\s*([\d.]+)\s*(in|cm|mm|px)?\s*', value)
+    if not match:
+        raise ValueError(f"Unsupported PDF length: {value}")
+    return float(match.group(1)) / UNITS_PER_INCH[match.group(2) or 'px']
+
+
+def print_params(options: Dict) -> Dict:
+    """Translate page.pdf() keyword arguments into Page.printToPDF parameters"""
+    width, height = PAPER_FORMATS[options.get('format', 'letter').lower()]
+    margin = options.get('margin', {})
+    return {
+        'paperWidth': width,
+        'paperHeight': height,
+        'marginTop': _inches(margin.get('top', 0)),
+        'marginRight': _inches(margin.get('right', 0)),
+        'marginBottom': _inches(margin.get('bottom', 0)),
+        'marginLeft': _inches(margin.get('left', 0)),
+        'printBackground': options.get('print_background', False),
+        'displayHeaderFooter': options.get('display_header_footer', False),
+        'preferCSSPageSize': options.get('prefer_css_page_size', False)
+    }
+
+
+async def print_pdf_streamed(
+    page: Page,
+    output_path: str,
+    options: Dict,
+    on_progress: Optional[Callable[[int], None]] = None,
+    chunk_size: int = settings.PDF_STREAM_CHUNK_SIZE
+) -> int:
+    """
+    Print a page to a PDF file, reading the result as a stream
+
+    page.pdf() receives the whole PDF as one base64 message before writing
+    it. Here Chromium keeps the PDF on its side (transferMode
+    ReturnAsStream) and it is read back in `chunk_size` pieces, each written
+    to disk before the next is requested.
+
+    Args:
+        page: Loaded page in a Chromium context
+        output_path: Where to write the PDF
+        options: page.pdf() keyword arguments (format, margin, print_background, ...)
+        on_progress: Called with the number of bytes just written
+        chunk_size: Bytes requested per read
+
+    Returns:
+        Size of the PDF in bytes
+    """
+    client = await page.context.new_cdp_session(page)
+    try:
+        result = await client.send('Page.printToPDF', {
+            **print_params(options),
+            'transferMode': 'ReturnAsStream'
+        })
+        stream = result['stream']
+
+        written = 0
+        try:
+            with open(output_path, 'wb') as f:
+                while True:
+                    chunk = await client.send('IO.read', {'handle': stream, 'size': chunk_size})
+                    data = chunk.get('data', '')
+                    data = base64.b64decode(data) if chunk.get('base64Encoded') else data.encode('utf-8')
+                    if data:
+                        f.write(data)
+                        written += len(data)
+                        if on_progress is not None:
+                            on_progress(len(data))
+                    if chunk.get('eof'):
+                        break
+        finally:
+            await client.send('IO.close', {'handle': stream})
+        return written
+    finally:
+        await client.detach()
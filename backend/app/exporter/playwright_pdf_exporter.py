@@ -2,12 +2,43 @@
 PDF exporter using Playwright (no GTK required!)
 """
 
-from playwright.sync_api import sync_playwright
-from typing import List, Dict
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from pathlib import Path
 import os
+import shutil
+import tempfile
 from datetime import datetime
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+
+from playwright.async_api import BrowserContext, Page
+
+from app.core.config import settings
+from app.exporter.direct_print import clean_live_page
+from app.exporter.image_assets import ImageAssets
+from app.exporter.page_store import iter_page_html
+from app.exporter.pdf_merge import PYPDF_AVAILABLE, PYPDF_ERROR, merge_pdf_chunks
+from app.exporter.pdf_stream import print_pdf_streamed
+from app.renderer.browser_pool import browser_pool
+from app.renderer.browser_thread import browser_thread
+from app.renderer.content_renderer import MAIN_CONTENT_SELECTORS
+from app.renderer.readiness import install_readiness_tracking, wait_until_ready
+from app.renderer.resource_blocker import ResourceBlocker
+
+
+# Page format shared by whole-document and chunked printing
+PDF_OPTIONS = {
+    'format': 'A4',
+    'print_background': True,
+    'margin': {
+        'top': '10mm',
+        'right': '10mm',
+        'bottom': '10mm',
+        'left': '10mm'
+    },
+    'display_header_footer': False
+}
+
+PDF_VIEWPORT = {'width': 1200, 'height': 1600}
 
 
 class PlaywrightPDFExporter:
@@ -17,6 +48,7 @@ class PlaywrightPDFExporter:
         self.output_dir = output_dir
         self.job_storage = job_storage
         self.job_id = job_id
+        self.pdf_bytes_written = 0  # Streamed out of Chromium so far, all sections together
         os.makedirs(output_dir, exist_ok=True)
     
     async def export(
@@ -25,17 +57,25 @@ class PlaywrightPDFExporter:
         output_filename: str,
         include_toc: bool = True,
         include_cover: bool = True,
-        custom_title: str = None
+        custom_title: str = None,
+        build_dir: Optional[str] = None
     ) -> str:
         """
-        Export pages to PDF using Playwright (sync in thread for Windows compatibility)
+        Export pages to PDF using Playwright (on the shared browser thread)
+        
+        Exports with more than PDF_CHUNK_PAGES pages are printed in chunks
+        in parallel browser pages and merged afterwards.
         
         Args:
-            pages: List of page dicts with 'title', 'html', 'url', 'metadata'
+            pages: List of page dicts with 'title', 'url', 'metadata' and
+                either 'html' or 'html_path' (PageStore.pages)
             output_filename: Output PDF filename
             include_toc: Include table of contents
             include_cover: Include cover page
             custom_title: Custom document title
+            build_dir: Directory the stored pages' images were written to
+                (PageStore.build_dir); documents are built there and it is
+                left in place. By default a temporary one is used.
             
         Returns:
             Path to generated PDF
@@ -44,92 +84,304 @@ class PlaywrightPDFExporter:
         self._log(f"Starting PDF generation for {total_pages} pages...")
         self._update_progress(80, f"Preparing PDF document with {total_pages} pages")
         
-        # Build complete HTML document
+        output_path = os.path.join(self.output_dir, output_filename)
+        self._log(f"Output file: {output_filename}")
+        
+        chunk_size = settings.PDF_CHUNK_PAGES
+        chunked = 0 < chunk_size < total_pages
+        if chunked and not PYPDF_AVAILABLE:
+            self._log(f"PDF merging unavailable ({PYPDF_ERROR}), printing as one document")
+            chunked = False
+        
+        # The document and its deduplicated images live in a build directory
+        # next to the PDF and are loaded from disk rather than pushed through
+        # set_content
+        owns_build_dir = build_dir is None
+        if owns_build_dir:
+            build_dir = tempfile.mkdtemp(prefix='.build-', dir=self.output_dir)
+        try:
+            assets = ImageAssets(os.path.join(build_dir, 'assets'))
+            if chunked:
+                await self._export_chunked(
+                    pages,
+                    output_path,
+                    build_dir,
+                    assets,
+                    chunk_size,
+                    include_toc=include_toc,
+                    include_cover=include_cover,
+                    custom_title=custom_title
+                )
+            else:
+                await self._export_single(
+                    pages,
+                    output_path,
+                    build_dir,
+                    assets,
+                    include_toc=include_toc,
+                    include_cover=include_cover,
+                    custom_title=custom_title
+                )
+        finally:
+            if owns_build_dir:
+                shutil.rmtree(build_dir, ignore_errors=True)
+        
+        self._update_progress(98, "Finalizing PDF...")
+        self._log(f"✓ PDF generated successfully: {output_filename} ({os.path.getsize(output_path):,} bytes)")
+        
+        return output_path
+    
+    async def export_direct(
+        self,
+        url: str,
+        filename_for: Callable[[Optional[str]], str],
+        include_images: bool = True,
+        include_cover: bool = True
+    ) -> Tuple[str, Dict]:
+        """
+        Print a single live page to PDF without rebuilding it
+        
+        The page is loaded once in a context leased from the browser pool,
+        cleaned up in place and printed from the same browser page; there
+        is no separate render, image download or document rebuild.
+        
+        Args:
+            url: Page to print
+            filename_for: Builds the output filename from the page title
+            include_images: Keep the page's images
+            include_cover: Include cover page
+            
+        Returns:
+            Tuple of (path to generated PDF, dict with the page's 'title',
+            'size', 'has_images' and 'word_count')
+        """
+        self._log(f"Printing {url} directly...")
+        self._update_progress(20, "Loading page...")
+        
+        # The final name depends on the page title, so print under a temporary one
+        fd, build_path = tempfile.mkstemp(prefix='.direct-', suffix='.pdf', dir=self.output_dir)
+        os.close(fd)
+        try:
+            info = await browser_thread.run(self._print_live(url, build_path, include_images, include_cover))
+            output_filename = filename_for(info['title'])
+            output_path = os.path.join(self.output_dir, output_filename)
+            os.replace(build_path, output_path)
+        finally:
+            if os.path.exists(build_path):
+                os.remove(build_path)
+        
+        self._update_progress(98, "Finalizing PDF...")
+        self._log(f"✓ PDF generated successfully: {output_filename} ({os.path.getsize(output_path):,} bytes)")
+        return output_path, info
+    
+    async def _print_live(self, url: str, output_path: str, include_images: bool, include_cover: bool) -> Dict:
+        """Load, clean up and print one page (runs on the browser thread)"""
+        async with browser_pool.lease(viewport=PDF_VIEWPORT) as context:
+            blocker = None
+            if settings.RENDER_BLOCK_RESOURCES:
+                blocker = ResourceBlocker()
+                await blocker.attach(context)
+            
+            await install_readiness_tracking(context)
+            
+            page = await context.new_page()
+            response = await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            if response is not None and response.status >= 400:
+                raise RuntimeError(f"Page returned HTTP {response.status}")
+            
+            readiness = await wait_until_ready(page, MAIN_CONTENT_SELECTORS, wait_for_images=False)
+            if not readiness['ready']:
+                self._log("Page still changing at the time budget, printing it as-is")
+            
+            self._update_progress(50, "Preparing page for print...")
+            title = await page.title()
+            cover_html = self._build_cover_page(title or url, [{'title': title}]) if include_cover else ''
+            info = await clean_live_page(page, include_images, self._get_pdf_styles(), cover_html)
+            
+            # Images of the cleaned-up content now have to be loaded and decoded
+            await page.emulate_media(media='print')
+            await wait_until_ready(page, ['.page-content'], wait_for_images=include_images)
+            
+            if blocker is not None:
+                self._log(f"Resources: {blocker.summary()}")
+            
+            self._update_progress(80, "Rendering PDF pages...")
+            await print_pdf_streamed(page, output_path, PDF_OPTIONS, on_progress=self._count_pdf_bytes)
+            return info
+    
+    async def _export_single(
+        self,
+        pages: List[Dict],
+        output_path: str,
+        build_dir: str,
+        assets: ImageAssets,
+        include_toc: bool,
+        include_cover: bool,
+        custom_title: str
+    ):
+        """Print all pages as one HTML document"""
+        doc_title = self._document_title(pages, custom_title)
+        
+        # Write the document to disk page by page; it is never held in memory whole
         self._log("Building HTML document...")
-        html_content = self._build_html(
-            pages,
-            include_toc=include_toc,
-            include_cover=include_cover,
-            custom_title=custom_title
+        html_path = os.path.join(build_dir, 'document.html')
+        loop = asyncio.get_event_loop()
+        html_size = await loop.run_in_executor(
+            None,
+            self._write_document,
+            html_path,
+            doc_title,
+            self._iter_body(pages, doc_title, include_toc, include_cover, assets)
         )
         
-        output_path = os.path.join(self.output_dir, output_filename)
-        self._log(f"Output file: {output_filename}")
-        self._log(f"HTML content size: {len(html_content):,} bytes")
+        self._log(f"HTML content size: {html_size:,} bytes")
+        self._log_assets(assets)
         print(f"PlaywrightPDFExporter: Building PDF at {output_path}")
-        print(f"PlaywrightPDFExporter: HTML content length: {len(html_content)}")
         
         self._update_progress(85, "Initializing PDF renderer...")
         self._log("Launching PDF renderer engine...")
         
-        # Run sync Playwright in thread pool for Windows compatibility
+        # Playwright runs on the shared browser thread (Windows-compatible)
+        await browser_thread.run(self._generate_pdf(html_path, output_path))
+    
+    async def _export_chunked(
+        self,
+        pages: List[Dict],
+        output_path: str,
+        build_dir: str,
+        assets: ImageAssets,
+        chunk_size: int,
+        include_toc: bool,
+        include_cover: bool,
+        custom_title: str
+    ):
+        """
+        Print the pages in sections of `chunk_size` and merge the PDFs
+        
+        Each browser page only lays out one section, so memory and print
+        time per page stay bounded by the chunk size. The cover and table of
+        contents are printed as a section of their own; the merge step
+        points the TOC links and the document outline at the merged pages.
+        """
+        doc_title = self._document_title(pages, custom_title)
         loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            await loop.run_in_executor(
-                executor,
-                self._generate_pdf_sync,
-                html_content,
-                output_path
-            )
         
-        self._update_progress(98, "Finalizing PDF...")
-        self._log(f"✓ PDF generated successfully: {output_filename}")
+        self._log(f"Building HTML sections of {chunk_size} pages...")
+        sections = []
+        if include_cover or (include_toc and len(pages) > 1):
+            sections.append((
+                'front',
+                self._iter_front_matter(pages, doc_title, include_toc, include_cover, anchors=True)
+            ))
+        for start in range(0, len(pages), chunk_size):
+            sections.append((
+                f"chunk-{start // chunk_size + 1:04d}",
+                self._iter_pages(pages[start:start + chunk_size], start + 1, assets, link_titles=True)
+            ))
+        
+        documents = []
+        html_size = 0
+        for name, parts in sections:
+            html_path = os.path.join(build_dir, f"{name}.html")
+            html_size += await loop.run_in_executor(None, self._write_document, html_path, doc_title, parts)
+            documents.append((html_path, os.path.join(build_dir, f"{name}.pdf")))
+        
+        self._log(f"{len(documents)} sections written ({html_size:,} bytes of HTML)")
+        self._log_assets(assets)
         
-        return output_path
+        self._update_progress(85, "Initializing PDF renderer...")
+        self._log(f"Printing {len(documents)} sections, {settings.PDF_CHUNK_CONCURRENCY} at a time...")
+        await browser_thread.run(self._print_documents(documents))
+        
+        self._update_progress(95, "Merging sections...")
+        self._log("Merging sections into one PDF...")
+        outline = [
+            (f"page-{i + 1}", page.get('title') or f"Page {i + 1}")
+            for i, page in enumerate(pages)
+        ]
+        page_count = await loop.run_in_executor(
+            None,
+            merge_pdf_chunks,
+            [pdf_path for _, pdf_path in documents],
+            output_path,
+            outline,
+            doc_title
+        )
+        self._log(f"✓ Merged {len(documents)} sections into {page_count} PDF pages")
+    
+    def _write_document(self, html_path: str, doc_title: str, parts: Iterable[str]) -> int:
+        """
+        Write an HTML document to disk one body part at a time (runs in the executor)
+        
+        Returns:
+            Size of the written file in bytes
+        """
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(self._build_head(doc_title))
+            for part in parts:
+                f.write(part)
+            f.write('</body></html>')
+        return os.path.getsize(html_path)
+    
+    async def _open_document(self, context: BrowserContext, html_path: str) -> Page:
+        """Load an HTML file from the build directory into a print-ready page"""
+        page = await context.new_page()
+        await page.emulate_media(media='print')
+        await page.goto(Path(html_path).resolve().as_uri(), wait_until='load')
+        
+        # Images are inlined; wait only until they are decoded and layout is stable
+        readiness = await wait_until_ready(page, ['body'])
+        if not readiness['ready']:
+            self._log(f"{Path(html_path).name} still settling at the time budget, printing as-is")
+        return page
     
-    def _generate_pdf_sync(self, html_content: str, output_path: str):
-        """Generate PDF synchronously in thread"""
+    async def _print_documents(self, documents: List[Tuple[str, str]]):
+        """Print section documents in parallel browser pages (runs on the browser thread)"""
+        semaphore = asyncio.Semaphore(settings.PDF_CHUNK_CONCURRENCY)
+        printed = 0
+        
+        async def print_one(html_path: str, pdf_path: str):
+            nonlocal printed
+            async with semaphore:
+                async with browser_pool.lease(viewport=PDF_VIEWPORT) as context:
+                    page = await self._open_document(context, html_path)
+                    await print_pdf_streamed(page, pdf_path, PDF_OPTIONS, on_progress=self._count_pdf_bytes)
+            printed += 1
+            self._log(f"Printed section {printed}/{len(documents)}")
+            self._update_progress(85 + 10 * printed / len(documents), f"Rendering PDF sections ({printed}/{len(documents)})...")
+        
+        tasks = [asyncio.create_task(print_one(html_path, pdf_path)) for html_path, pdf_path in documents]
         try:
-            print("PlaywrightPDFExporter: Starting sync Playwright in thread...")
+            await asyncio.gather(*tasks)
+        finally:
+            # Stop printing on the first error
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _generate_pdf(self, html_path: str, output_path: str):
+        """Generate PDF in a context leased from the browser pool (runs on the browser thread)"""
+        try:
+            print("PlaywrightPDFExporter: Leasing browser context from pool...")
             self._log("Initializing browser engine...")
             
-            with sync_playwright() as p:
-                print("PlaywrightPDFExporter: Launching browser...")
-                self._log("Launching headless browser...")
-                browser = p.chromium.launch(
-                    args=['--disable-web-security', '--disable-features=IsolateOrigins,site-per-process']
-                )
-                page = browser.new_page()
-                page.set_viewport_size({'width': 1200, 'height': 1600})
-                page.emulate_media(media='print')
-                
+            async with browser_pool.lease(viewport=PDF_VIEWPORT) as context:
                 print("PlaywrightPDFExporter: Setting content...")
                 self._log("Loading HTML content into browser...")
                 self._update_progress(87, "Loading content...")
-                page.set_content(html_content, wait_until='load')
-                
-                # Wait additional time for images to load
-                import time
-                time.sleep(3)
-                
-                # Try to wait for network to be idle
-                try:
-                    page.wait_for_load_state('networkidle', timeout=5000)
-                except:
-                    pass
+                page = await self._open_document(context, html_path)
                 
                 print("PlaywrightPDFExporter: Generating PDF...")
                 self._log("Rendering pages to PDF format...")
                 self._update_progress(90, "Rendering PDF pages...")
-                page.pdf(
-                    path=output_path,
-                    format='A4',
-                    print_background=True,
-                    margin={
-                        'top': '10mm',
-                        'right': '10mm',
-                        'bottom': '10mm',
-                        'left': '10mm'
-                    },
-                    display_header_footer=False
-                )
+                await print_pdf_streamed(page, output_path, PDF_OPTIONS, on_progress=self._count_pdf_bytes)
                 
-                print("PlaywrightPDFExporter: Closing browser...")
+                print("PlaywrightPDFExporter: Releasing browser context...")
                 self._log("Cleaning up browser resources...")
                 self._update_progress(95, "Finalizing document...")
-                browser.close()
-                print(f"PlaywrightPDFExporter: PDF created successfully at {output_path}")
-                self._log("✓ PDF generation completed successfully!")
+            
+            print(f"PlaywrightPDFExporter: PDF created successfully at {output_path}")
+            self._log("✓ PDF generation completed successfully!")
         except Exception as e:
             print(f"PlaywrightPDFExporter ERROR: {e}")
             self._log(f"✗ PDF generation error: {str(e)}")
@@ -137,18 +389,48 @@ class PlaywrightPDFExporter:
             print(f"PlaywrightPDFExporter traceback: {traceback.format_exc()}")
             raise
     
-    def _build_html(
+    def _iter_body(
         self,
         pages: List[Dict],
+        doc_title: str,
         include_toc: bool = True,
         include_cover: bool = True,
-        custom_title: str = None
-    ) -> str:
-        """Build complete HTML document from pages"""
+        assets: Optional[ImageAssets] = None
+    ) -> Iterator[str]:
+        """
+        Generate the body of the complete document, one part per page
         
-        # Get title from first page or use custom
-        doc_title = custom_title or (pages[0].get('title') if pages else 'Document')
+        When `assets` is given, inlined images are written out once each and
+        referenced by relative path instead of being repeated in the document.
+        """
+        yield from self._iter_front_matter(pages, doc_title, include_toc, include_cover)
+        yield from self._iter_pages(pages, 1, assets)
+    
+    def _iter_front_matter(
+        self,
+        pages: List[Dict],
+        doc_title: str,
+        include_toc: bool,
+        include_cover: bool,
+        anchors: bool = False
+    ) -> Iterator[str]:
+        """
+        Generate the cover page and table of contents
+        
+        With `anchors`, the TOC links get invisible targets so Chromium keeps
+        them when the front matter is printed without the pages; the merge
+        step retargets them to the real pages.
+        """
+        # Cover page
+        if include_cover:
+            yield self._build_cover_page(doc_title, pages)
         
+        # Table of contents
+        if include_toc and len(pages) > 1:
+            yield self._build_toc(pages, anchors=anchors)
+    
+    def _build_head(self, doc_title: str) -> str:
+        """Document head with the PDF styles, up to the opening body tag"""
         html_parts = ['<!DOCTYPE html><html><head>']
         html_parts.append('<meta charset="UTF-8">')
         html_parts.append(f'<title>{doc_title}</title>')
@@ -156,29 +438,42 @@ class PlaywrightPDFExporter:
         html_parts.append(self._get_pdf_styles())
         html_parts.append('</style>')
         html_parts.append('</head><body>')
+        return ''.join(html_parts)
+    
+    def _iter_pages(
+        self,
+        pages: List[Dict],
+        first_number: int,
+        assets: Optional[ImageAssets] = None,
+        link_titles: bool = False
+    ) -> Iterator[str]:
+        """
+        Generate the content pages, numbered from `first_number`
         
-        # Cover page
-        if include_cover:
-            html_parts.append(self._build_cover_page(doc_title, pages))
-        
-        # Table of contents
-        if include_toc and len(pages) > 1:
-            html_parts.append(self._build_toc(pages))
-        
-        # Content pages
+        With `link_titles`, each page title links to its own anchor, which
+        makes Chromium record the anchor as a named destination in the PDF
+        for the merge step to find.
+        """
         for i, page in enumerate(pages):
-            html_parts.append(f'<div class="page-content" id="page-{i+1}">')
-            html_parts.append(f'<h1 class="page-title">{page.get("title", f"Page {i+1}")}</h1>')
-            html_parts.append(page.get('html', ''))
-            html_parts.append('</div>')
+            number = first_number + i
+            title = page.get("title", f"Page {number}")
+            if link_titles:
+                title = f'<a class="page-anchor" href="#page-{number}">{title}</a>'
             
+            yield f'<div class="page-content" id="page-{number}"><h1 class="page-title">{title}</h1>'
+            # Stored pages are copied from disk in chunks
+            yield from iter_page_html(page, assets)
+            
+            html_parts = ['</div>']
             # Page break between pages (except last)
             if i < len(pages) - 1:
                 html_parts.append('<div style="page-break-after: always;"></div>')
-        
-        html_parts.append('</body></html>')
-        
-        return ''.join(html_parts)
+            
+            yield ''.join(html_parts)
+    
+    def _document_title(self, pages: List[Dict], custom_title: str = None) -> str:
+        """Custom title, else the first page's title"""
+        return custom_title or (pages[0].get('title') if pages else 'Document')
     
     def _build_cover_page(self, title: str, pages: List[Dict]) -> str:
         """Build cover page with enhanced professional styling"""
@@ -204,8 +499,13 @@ class PlaywrightPDFExporter:
         </div>
         '''
     
-    def _build_toc(self, pages: List[Dict]) -> str:
-        """Build table of contents"""
+    def _build_toc(self, pages: List[Dict], anchors: bool = False) -> str:
+        """
+        Build table of contents
+        
+        With `anchors`, empty placeholder targets for the links are added
+        (for front matter printed without the pages).
+        """
         toc_items = []
         
         for i, page in enumerate(pages):
@@ -219,14 +519,30 @@ class PlaywrightPDFExporter:
             <ul class="toc-list">
         '''
         toc_html += '\n'.join(toc_items)
+        toc_html += '\n            </ul>'
+        if anchors:
+            toc_html += ''.join(f'<div class="toc-anchor" id="page-{i+1}"></div>' for i in range(len(pages)))
         toc_html += '''
-            </ul>
         </div>
         <div style="page-break-after: always;"></div>
         '''
         
         return toc_html
     
+    def _log_assets(self, assets: ImageAssets):
+        """Log how many image files the document references"""
+        if assets.references:
+            self._log(
+                f"Images: {assets.unique} unique files ({assets.bytes_written:,} bytes) "
+                f"for {assets.references} references"
+            )
+    
+    def _count_pdf_bytes(self, size: int):
+        """Report PDF bytes streamed to disk to the job"""
+        self.pdf_bytes_written += size
+        if self.job_storage and self.job_id:
+            self.job_storage.update_job(self.job_id, pdf_bytes_written=self.pdf_bytes_written)
+    
     def _log(self, message: str):
         """Add log message if job_storage is available"""
         if self.job_storage and self.job_id:
@@ -391,6 +707,17 @@ class PlaywrightPDFExporter:
             padding-bottom: 10px;
         }
         
+        .page-title a.page-anchor {
+            color: inherit;
+            text-decoration: none;
+            word-break: normal;
+        }
+        
+        .toc-anchor {
+            display: block;
+            height: 0;
+        }
+        
         h1 { font-size: 24pt; margin: 25px 0 15px; color: #444; line-height: 1.4; }
         h2 { font-size: 20pt; margin: 22px 0 12px; color: #555; line-height: 1.4; }
         h3 { font-size: 16pt; margin: 20px 0 10px; color: #666; line-height: 1.4; }
@@ -0,0 +1,232 @@
+"""
+Process-wide pool of warm Chromium browsers
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from app.core.config import settings
+from app.renderer.browser_thread import browser_thread
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _process_rss(pid: int) -> int:
+    """Resident set size of a process in bytes (0 if unknown)"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except Exception:
+            return 0
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+class _PooledBrowser:
+    """One Chromium process and its lease bookkeeping"""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.active = 0  # Contexts currently leased
+        self.served = 0  # Contexts leased since launch
+        self.retiring = False  # No new leases; closed once idle
+
+
+class BrowserPool:
+    """
+    Warm Chromium instances shared by every job
+
+    Jobs lease an isolated BrowserContext (own cookies, cache and storage)
+    instead of launching a browser. Each browser serves up to
+    `max_contexts` leases at once and is recycled after `recycle_pages`
+    leases or once its processes exceed `recycle_rss_mb`, which contains
+    Chromium's memory growth on long-running servers. Memory is measured
+    every `rss_check_every` leases, as it takes a CDP round trip; the
+    lease count is checked on every release.
+
+    All Playwright objects live on the shared browser thread: start() and
+    close() may be awaited from anywhere, but lease() must be used by code
+    running on that thread (see BrowserThread.run).
+    """
+
+    def __init__(
+        self,
+        size: int = settings.BROWSER_POOL_SIZE,
+        max_contexts: int = settings.BROWSER_MAX_CONTEXTS,
+        recycle_pages: int = settings.BROWSER_RECYCLE_PAGES,
+        recycle_rss_mb: int = settings.BROWSER_RECYCLE_RSS_MB,
+        rss_check_every: int = settings.BROWSER_RSS_CHECK_EVERY
+    ):
+        self.size = size
+        self.max_contexts = max_contexts
+        self.recycle_pages = recycle_pages
+        self.recycle_rss_mb = recycle_rss_mb
+        self.rss_check_every = max(1, rss_check_every)
+        self._playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._waiting = 0
+        self._launched = 0
+        self._recycled = 0
+
+    async def start(self):
+        """Launch the warm browsers (called from the application lifespan)"""
+        await browser_thread.run(self._warm_up())
+        print(f"[BrowserPool] {len(self._browsers)} browsers ready ({self.max_contexts} contexts each)")
+
+    async def close(self):
+        """Close every browser and stop Playwright"""
+        await browser_thread.run(self._shutdown())
+
+    def stats(self) -> Dict[str, int]:
+        """Pool occupancy snapshot (safe to call from any thread)"""
+        browsers = list(self._browsers)
+        return {
+            'browsers': len(browsers),
+            'capacity': self.size * self.max_contexts,
+            'leased': sum(entry.active for entry in browsers),
+            'waiting': self._waiting,
+            'launched': self._launched,
+            'recycled': self._recycled
+        }
+
+    @asynccontextmanager
+    async def lease(self, **context_options) -> AsyncIterator[BrowserContext]:
+        """
+        Lease an isolated browser context (browser thread only)
+
+        Waits while the pool is at capacity. The context is closed when the
+        block exits.
+
+        Args:
+            **context_options: Passed to Browser.new_context (e.g. viewport)
+
+        Yields:
+            BrowserContext
+        """
+        self._init_primitives()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        entry = None
+        context = None
+        try:
+            entry = await self._pick_browser()
+            entry.active += 1
+            context = await entry.browser.new_context(**context_options)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if entry is not None:
+                entry.active -= 1
+                entry.served += 1
+                await self._check_recycle(entry)
+            self._slots.release()
+
+    def _init_primitives(self):
+        """Create the semaphore and lock on the browser thread's loop"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size * self.max_contexts)
+            self._lock = asyncio.Lock()
+
+    async def _warm_up(self):
+        self._init_primitives()
+        async with self._lock:
+            while len(self._live_browsers()) < self.size:
+                await self._launch()
+
+    async def _pick_browser(self) -> _PooledBrowser:
+        """Least busy live browser with a free slot, launching one if needed"""
+        async with self._lock:
+            candidates = [entry for entry in self._live_browsers() if entry.active < self.max_contexts]
+            if candidates:
+                return min(candidates, key=lambda entry: entry.active)
+            return await self._launch()
+
+    async def _launch(self) -> _PooledBrowser:
+        if self._playwright is None:
+            print("[BrowserPool] Starting Playwright on the browser thread")
+            self._playwright = await async_playwright().start()
+
+        browser = await self._playwright.chromium.launch(headless=True)
+        entry = _PooledBrowser(browser)
+        # A crashed browser is dropped and replaced on the next lease
+        browser.on('disconnected', lambda _: self._discard(entry))
+        self._browsers.append(entry)
+        self._launched += 1
+        print(f"[BrowserPool] Launched browser #{self._launched}")
+        return entry
+
+    async def _check_recycle(self, entry: _PooledBrowser):
+        """Retire a browser that hit its page or memory limit; close it once idle"""
+        if not entry.retiring:
+            if self.recycle_pages and entry.served >= self.recycle_pages:
+                entry.retiring = True
+                print(f"[BrowserPool] Recycling browser after {entry.served} contexts")
+            elif self.recycle_rss_mb and entry.served % self.rss_check_every == 0:
+                rss = await self._browser_rss(entry.browser)
+                if rss > self.recycle_rss_mb * 1024 * 1024:
+                    entry.retiring = True
+                    print(f"[BrowserPool] Recycling browser at {rss // (1024 * 1024)}MB RSS")
+
+        # Crashed browsers were already dropped by the disconnected handler
+        if entry.retiring and entry.active == 0 and entry in self._browsers:
+            self._discard(entry)
+            self._recycled += 1
+            try:
+                await entry.browser.close()
+            except Exception:
+                pass
+
+    async def _browser_rss(self, browser: Browser) -> int:
+        """Total RSS of the browser's processes (0 if it can't be measured)"""
+        try:
+            session = await browser.new_browser_cdp_session()
+            try:
+                info = await session.send('SystemInfo.getProcessInfo')
+            finally:
+                await session.detach()
+        except Exception:
+            return 0
+        return sum(_process_rss(process['id']) for process in info.get('processInfo', []))
+
+    def _discard(self, entry: _PooledBrowser):
+        entry.retiring = True
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+
+    def _live_browsers(self) -> List[_PooledBrowser]:
+        return [entry for entry in self._browsers if not entry.retiring]
+
+    async def _shutdown(self):
+        for entry in list(self._browsers):
+            self._discard(entry)
+            try:
+                await entry.browser.close()
+            except Exception:
+                pass
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+# Global browser pool, started in the application lifespan
+browser_pool = BrowserPool()
@@ -0,0 +1,83 @@
+"""
+Dedicated event loop thread for async Playwright
+"""
+
+import asyncio
+import sys
+import threading
+from typing import Awaitable, Optional
+
+
+class BrowserThread:
+    """
+    Background thread that runs async Playwright on its own event loop
+
+    Playwright starts the browser as a subprocess, which the Selector event
+    loop uvicorn uses on Windows cannot do. Running Playwright on a Proactor
+    loop in a separate thread keeps it working there, and because the API is
+    async, one thread drives many browser pages at once.
+    """
+
+    def __init__(self, name: str = "playwright"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the thread and its event loop (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+            print(f"[BrowserThread] Event loop thread '{self.name}' started")
+
+    def stop(self):
+        """Stop the event loop and wait for the thread to exit"""
+        with self._lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=10)
+            self._thread = None
+            self._loop = None
+
+    async def run(self, coro: Awaitable):
+        """
+        Run a coroutine on the browser thread and await its result
+
+        Args:
+            coro: Coroutine using the async Playwright API
+
+        Returns:
+            The coroutine's result
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        return await asyncio.wrap_future(future)
+
+    def _run(self, ready: threading.Event):
+        """Thread body: create the loop and run it until stop()"""
+        if sys.platform == 'win32':
+            loop = asyncio.ProactorEventLoop()
+        else:
+            loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        ready.set()
+
+        try:
+            loop.run_forever()
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+
+# Global browser thread shared by renderers and exporters
+browser_thread = BrowserThread()
@@ -2,153 +2,300 @@
 Content renderer - extracts and cleans content from HTML
 """
 
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 import re
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-import urllib3
 
-# Suppress SSL warnings when downloading images
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from app.core.config import settings
+from app.renderer.browser_pool import browser_pool
+from app.renderer.browser_thread import browser_thread
+from app.renderer.image_fetcher import ImageFetcher
+from app.renderer.image_optimizer import DEFAULT_PROFILE
+from app.renderer.readiness import install_readiness_tracking, wait_until_ready
+from app.renderer.resource_blocker import ResourceBlocker
+from app.renderer.response_capture import ImageCapture
+
+# Common main-content containers, tried in order
+MAIN_CONTENT_SELECTORS = [
+    'main',
+    'article',
+    '.content',
+    '#content',
+    '.main-content',
+    '.post-content',
+    '.entry-content',
+    '[role="main"]'
+]
+
+# Page chrome and non-content elements dropped before extraction
+REMOVED_ELEMENTS = ['script', 'style', 'nav', 'footer', 'header', 'iframe', 'noscript']
+
+# Inline styles applied to embedded images and links
+IMAGE_STYLE = 'max-width: 100%; height: auto; display: block; margin: 10px 0;'
+LINK_STYLE = 'color: #2563eb; text-decoration: underline; word-break: break-all;'
 
 
 class ContentRenderer:
-    """Renders and cleans HTML content using sync Playwright in thread pool"""
+    """
+    Renders and cleans HTML content with several browser pages in flight
     
-    def __init__(self):
-        self.playwright = None
-        self.browser = None
-        self.executor = ThreadPoolExecutor(max_workers=1)
+    Pages are loaded in contexts leased from the shared browser pool, so no
+    browser is launched per job. Up to `concurrency` pages render at once;
+    content extraction runs on a thread pool of the same size and image
+    optimization in the shared image process pool.
+    """
     
-    async def __aenter__(self):
-        """Async context manager entry - runs sync Playwright in thread"""
-        try:
-            print("[ContentRenderer] Starting Playwright in thread pool (Windows-compatible)")
-            # Run sync Playwright setup in a thread to avoid Windows event loop issues
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(self.executor, self._setup_browser)
-            print("[ContentRenderer] Browser launched successfully")
-            return self
-        except Exception as e:
-            print(f"[ContentRenderer] ERROR in __aenter__: {e}")
-            print(f"[ContentRenderer] Exception type: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            raise
+    def __init__(self, concurrency: int = settings.RENDER_CONCURRENCY, image_profile: str = DEFAULT_PROFILE):
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.image_fetcher = ImageFetcher(profile=image_profile)
     
-    def _setup_browser(self):
-        """Setup browser in thread (sync)"""
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(headless=True)
+    async def __aenter__(self):
+        """Async context manager entry"""
+        print(f"[ContentRenderer] Renderer ready ({self.concurrency} concurrent pages)")
+        return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(self.executor, self._cleanup_browser)
+        await self.image_fetcher.close()
         self.executor.shutdown(wait=True)
     
-    def _cleanup_browser(self):
-        """Cleanup browser in thread (sync)"""
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
-    
-    async def render_page(self, url: str, include_images: bool = True) -> Dict:
+    async def render_page(
+        self,
+        url: str,
+        include_images: bool = True,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Dict:
         """
         Render page with JavaScript and extract clean content
         
+        Up to `concurrency` calls render at the same time; callers can simply
+        start one task per page.
+        
         Args:
             url: URL to render
             include_images: Whether to include images
+            on_start: Called once the page gets a render slot (e.g. to log it)
             
         Returns:
-            Dict with title, content, images, metadata
+            Dict with title, content, images, metadata (including resource
+            blocking counters under 'resources' when blocking is enabled)
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor, 
-            self._render_page_sync, 
-            url, 
-            include_images
-        )
-    
-    def _render_page_sync(self, url: str, include_images: bool = True) -> Dict:
-        """Synchronous page rendering in thread"""
-        page = self.browser.new_page()
-        
-        try:
-            page.goto(url, wait_until='networkidle', timeout=30000)
+        async with self._semaphore:
+            if on_start is not None:
+                on_start()
+            content, title, resources, captured = await browser_thread.run(
+                self._load_page(url, capture_images=include_images)
+            )
             
-            # Wait for images to load
-            try:
-                page.wait_for_load_state('load', timeout=5000)
-            except:
-                pass
+            result = await self._process_html(
+                content,
+                url,
+                url,
+                include_images,
+                fallback_title=title,
+                captured=captured
+            )
             
-            # Get rendered HTML
-            content = page.content()
+            if resources is not None:
+                result['metadata']['resources'] = resources
+            return result
+    
+    async def render_static(
+        self,
+        url: str,
+        html_path: str,
+        include_images: bool = True,
+        base_url: str = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Extract clean content from HTML the crawler already fetched
+        
+        Used for pages that don't need JavaScript; no browser is involved.
+        
+        Args:
+            url: URL of the page
+            html_path: File the crawler wrote the fetched HTML to
+                (BaseCrawler.static_pages)
+            include_images: Whether to include images
+            base_url: URL to resolve relative links against (final URL after
+                redirects), defaults to url
+            on_start: Called once the page gets a render slot (e.g. to log it)
             
-            # Extract main content
-            soup = BeautifulSoup(content, 'html.parser')
+        Returns:
+            Dict with title, content, images, metadata
+        """
+        async with self._semaphore:
+            if on_start is not None:
+                on_start()
+            loop = asyncio.get_event_loop()
+            html = await loop.run_in_executor(self.executor, self._read_html, html_path)
+            return await self._process_html(html, url, base_url or url, include_images)
+    
+    def _read_html(self, html_path: str) -> str:
+        """Read HTML kept on disk by the crawler (runs on the thread pool)"""
+        with open(html_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    async def _load_page(self, url: str, capture_images: bool = True) -> Tuple[str, str, Optional[Dict], Dict]:
+        """
+        Load a page in a leased browser context (runs on the browser thread)
+        
+        Returns:
+            Tuple of (rendered HTML, document title, resource blocker counters
+            or None, image responses captured by the browser keyed by URL)
+        """
+        async with browser_pool.lease() as context:
+            blocker = None
+            if settings.RENDER_BLOCK_RESOURCES:
+                blocker = ResourceBlocker()
+                await blocker.attach(context)
             
-            # Remove unwanted elements
-            for element in soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'iframe', 'noscript']):
-                element.decompose()
+            capture = None
+            if capture_images and settings.RENDER_CAPTURE_IMAGES:
+                capture = ImageCapture()
+                capture.attach(context)
             
-            # Extract title
-            title = soup.title.string if soup.title else page.title()
+            await install_readiness_tracking(context)
             
-            # Find main content area (heuristic)
-            main_content = self._extract_main_content(soup)
+            page = await context.new_page()
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
             
-            # Process images - make URLs absolute
-            if include_images:
-                self._process_images(main_content, url)
+            # Wait for the main content to settle rather than for network idle.
+            # Images the browser hasn't loaded by then are downloaded
+            # separately, so only the DOM matters here.
+            readiness = await wait_until_ready(page, MAIN_CONTENT_SELECTORS, wait_for_images=False)
+            if not readiness['ready']:
+                print(f"[ContentRenderer] {url} still changing after {readiness['elapsed'] / 1000:.1f}s, using it as-is")
             
-            # Process links - ensure they're clickable
-            self._process_links(main_content, url)
+            if blocker is not None:
+                print(f"[ContentRenderer] {url}: {blocker.summary()}")
             
-            # Extract images list
-            images = []
-            if include_images:
-                images = self._extract_images_sync(main_content, url)
+            # Get rendered HTML
+            content, title = await page.content(), await page.title()
             
-            # Extract metadata
-            metadata = {
-                'title': title,
-                'url': url,
-                'description': self._get_meta_description(soup)
-            }
+            # Bodies must be read before the lease closes the context
+            captured = await capture.collect() if capture is not None else {}
             
-            return {
-                'title': title,
-                'html': str(main_content),
-                'text': main_content.get_text(separator='\n', strip=True),
-                'images': images,
-                'metadata': metadata
-            }
+            return content, title, blocker.stats if blocker else None, captured
+    
+    async def _process_html(
+        self,
+        content: str,
+        url: str,
+        base_url: str,
+        include_images: bool = True,
+        fallback_title: str = None,
+        captured: Dict = None
+    ) -> Dict:
+        """
+        Extract main content, images and metadata from a page's HTML
         
-        finally:
-            page.close()
+        Parsing and image embedding run on the thread pool; the page's
+        images are downloaded concurrently in between, except those in
+        `captured` (image responses recorded by the browser).
+        """
+        loop = asyncio.get_event_loop()
+        soup, main_content, title = await loop.run_in_executor(
+            self.executor,
+            self._parse_html,
+            content,
+            fallback_title
+        )
+        
+        downloads = {}
+        if include_images:
+            downloads = await self.image_fetcher.fetch_all(
+                self._image_urls(main_content, base_url),
+                captured=captured
+            )
+        
+        return await loop.run_in_executor(
+            self.executor,
+            self._finish_page,
+            soup,
+            main_content,
+            title,
+            url,
+            base_url,
+            include_images,
+            downloads
+        )
+    
+    def _parse_html(self, content: str, fallback_title: str = None) -> Tuple:
+        """Parse HTML and locate the main content (runs on the thread pool)"""
+        # Extract main content
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Remove unwanted elements
+        for element in soup.find_all(REMOVED_ELEMENTS):
+            element.decompose()
+        
+        # Extract title
+        title = soup.title.string if soup.title else fallback_title
+        
+        # Find main content area (heuristic)
+        main_content = self._extract_main_content(soup)
+        
+        return soup, main_content, title
+    
+    def _image_urls(self, soup: BeautifulSoup, base_url: str) -> List[str]:
+        """Absolute URLs of the images that need downloading"""
+        from urllib.parse import urljoin
+        
+        urls = []
+        for img in soup.find_all('img'):
+            src = img.get('src', '')
+            if src and not src.startswith('data:image'):
+                urls.append(urljoin(base_url, src))
+        return urls
+    
+    def _finish_page(
+        self,
+        soup: BeautifulSoup,
+        main_content,
+        title: str,
+        url: str,
+        base_url: str,
+        include_images: bool,
+        downloads: Dict
+    ) -> Dict:
+        """Embed images, fix links and build the page result (runs on the thread pool)"""
+        # Process images - embed downloaded images as data URIs
+        if include_images:
+            self._process_images(main_content, base_url, downloads)
+        
+        # Process links - ensure they're clickable
+        self._process_links(main_content, base_url)
+        
+        # Extract images list
+        images = []
+        if include_images:
+            images = self._extract_images_sync(main_content, base_url)
+        
+        # Extract metadata
+        metadata = {
+            'title': title,
+            'url': url,
+            'description': self._get_meta_description(soup)
+        }
+        
+        return {
+            'title': title,
+            'html': str(main_content),
+            'text': main_content.get_text(separator='\n', strip=True),
+            'images': images,
+            'metadata': metadata
+        }
     
     def _extract_main_content(self, soup: BeautifulSoup):
         """Extract main content using heuristics"""
         # Try common content selectors
-        selectors = [
-            'main',
-            'article',
-            '.content',
-            '#content',
-            '.main-content',
-            '.post-content',
-            '.entry-content',
-            '[role="main"]'
-        ]
-        
-        for selector in selectors:
+        for selector in MAIN_CONTENT_SELECTORS:
             element = soup.select_one(selector)
             if element:
                 return element
@@ -160,13 +307,17 @@ class ContentRenderer:
         
         return soup
     
-    def _process_images(self, soup: BeautifulSoup, base_url: str):
-        """Process images to convert to base64 data URIs for PDF embedding"""
+    def _process_images(self, soup: BeautifulSoup, base_url: str, downloads: Dict):
+        """
+        Process images to convert to base64 data URIs for PDF embedding
+        
+        Args:
+            soup: Main content element
+            base_url: URL to resolve image sources against
+            downloads: Result of ImageFetcher.fetch_all() for the content's images
+        """
         from urllib.parse import urljoin
-        import requests
         import base64
-        from io import BytesIO
-        from PIL import Image
         
         total_images = len(soup.find_all('img'))
         processed = 0
@@ -189,49 +340,16 @@ class ContentRenderer:
                         img['alt'] = 'Image'
                     
                     # Add styling
-                    img['style'] = 'max-width: 100%; height: auto; display: block; margin: 10px 0;'
+                    img['style'] = IMAGE_STYLE
                     continue
                 
                 # Convert to absolute URL
                 absolute_src = urljoin(base_url, src)
-                print(f"[ContentRenderer] Downloading image: {absolute_src[:80]}...")
+                download = downloads.get(absolute_src)
                 
-                # Download and convert to base64
-                response = requests.get(absolute_src, timeout=15, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'
-                }, verify=False)
-                
-                if response.status_code == 200:
-                    # Get image content
-                    img_content = response.content
-                    content_type = response.headers.get('Content-Type', 'image/png')
-                    
-                    # Optimize image size for PDF
-                    try:
-                        pil_img = Image.open(BytesIO(img_content))
-                        
-                        # Resize if too large (max width 800px)
-                        if pil_img.width > 800:
-                            ratio = 800 / pil_img.width
-                            new_size = (800, int(pil_img.height * ratio))
-                            pil_img = pil_img.resize(new_size, Image.Resampling.LANCZOS)
-                        
-                        # Convert to RGB if needed
-                        if pil_img.mode in ('RGBA', 'LA', 'P'):
-                            background = Image.new('RGB', pil_img.size, (255, 255, 255))
-                            if pil_img.mode == 'P':
-                                pil_img = pil_img.convert('RGBA')
-                            background.paste(pil_img, mask=pil_img.split()[-1] if pil_img.mode in ('RGBA', 'LA') else None)
-                            pil_img = background
-                        
-                        # Save optimized image
-                        buffer = BytesIO()
-                        pil_img.save(buffer, format='JPEG', quality=85, optimize=True)
-                        img_content = buffer.getvalue()
-                        content_type = 'image/jpeg'
-                    except Exception as e:
-                        print(f"[ContentRenderer] Image optimization failed for {absolute_src[:50]}: {e}")
+                if download is not None:
+                    # Already optimized for PDF by the image fetcher
+                    img_content, content_type = download
                     
                     # Convert to base64
                     base64_img = base64.b64encode(img_content).decode('utf-8')
@@ -247,10 +365,10 @@ class ContentRenderer:
                         img['alt'] = 'Image'
                     
                     # Add styling
-                    img['style'] = 'max-width: 100%; height: auto; display: block; margin: 10px 0;'
+                    img['style'] = IMAGE_STYLE
                     
                 else:
-                    print(f"[ContentRenderer] ✗ Failed to download image: {absolute_src[:60]} (Status: {response.status_code})")
+                    print(f"[ContentRenderer] ✗ Image not available, dropping it: {absolute_src[:60]}")
                     # Remove image if download failed
                     img.decompose()
                     
@@ -278,7 +396,7 @@ class ContentRenderer:
                 link['href'] = absolute_href
                 
                 # Add styling to make links visually distinct
-                link['style'] = 'color: #2563eb; text-decoration: underline; word-break: break-all;'
+                link['style'] = LINK_STYLE
                 
                 # Ensure link has content or href as text
                 if not link.get_text(strip=True):
@@ -0,0 +1,147 @@
+"""
+Content-addressed on-disk cache of optimized images
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.disk_cache import DiskCache
+
+
+class ImageCache(DiskCache):
+    """
+    Optimized image bytes shared across pages and jobs
+
+    Entries are keyed by absolute image URL (prefixed with the image profile
+    by ImageFetcher). Each key has a small JSON record
+    (validators, fetch time, content type) pointing at a blob named by the
+    SHA-256 of the optimized bytes, so identical images served from
+    different URLs are stored once. Blobs are the data files DiskCache
+    evicts in least-recently-used order; a record whose blob is gone is
+    dropped the next time it is looked up.
+    """
+
+    label = 'ImageCache'
+
+    def __init__(self, cache_dir: str, max_size: int, ttl: float):
+        super().__init__(cache_dir, os.path.join(cache_dir, 'blobs'), max_size)
+        self.ttl = ttl
+
+    async def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Get the record for a cache key
+
+        Returns:
+            Dict with 'digest', 'content_type', 'etag', 'last_modified' and
+            'fetched_at', or None if the key (or its blob) isn't cached
+        """
+        return await self._run(self._read_meta, key)
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """Whether a record may be used without revalidating it"""
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    async def load(self, entry: Dict) -> Optional[Tuple[bytes, str]]:
+        """Read a record's optimized bytes and mark the blob as recently used"""
+        return await self._run(self._read_blob, entry)
+
+    async def touch(self, key: str, entry: Dict):
+        """Mark a record as revalidated (after 304 Not Modified)"""
+        entry['fetched_at'] = time.time()
+        try:
+            await self._run(self._write_meta, key, entry)
+        except OSError as e:
+            print(f"[ImageCache] Failed to update {key[:80]}: {e}")
+
+    async def store(
+        self,
+        key: str,
+        content: bytes,
+        content_type: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """Store optimized image bytes under a cache key"""
+        await self._run(self._write_entry, key, content, content_type, etag, last_modified)
+
+    def _read_meta(self, key: str) -> Optional[Dict]:
+        meta_path = self._meta_path(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(self._blob_path(entry.get('digest', ''))):
+            # Blob was evicted; the record is useless now
+            try:
+                os.remove(meta_path)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def _read_blob(self, entry: Dict) -> Optional[Tuple[bytes, str]]:
+        blob_path = self._blob_path(entry['digest'])
+        try:
+            with open(blob_path, 'rb') as f:
+                content = f.read()
+            os.utime(blob_path)
+        except OSError:
+            return None
+
+        self._touch(entry['digest'])
+        return content, entry['content_type']
+
+    def _write_entry(
+        self,
+        key: str,
+        content: bytes,
+        content_type: str,
+        etag: Optional[str],
+        last_modified: Optional[str]
+    ):
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        try:
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                self._write_atomic(blob_path, content)
+            self._write_meta(key, {
+                'key': key,
+                'digest': digest,
+                'content_type': content_type,
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': time.time()
+            })
+        except OSError as e:
+            print(f"[ImageCache] Failed to store {key[:80]}: {e}")
+            return
+
+        self._add(digest, len(content))
+
+    def _write_meta(self, key: str, entry: Dict):
+        meta_path = self._meta_path(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        self._write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+
+    def _meta_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'urls', digest + '.json')
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.data_dir, digest)
+
+
+# Global image cache instance
+image_cache = ImageCache(
+    settings.IMAGE_CACHE_DIR or os.path.join(settings.EXPORT_DIR, '.image_cache'),
+    settings.IMAGE_CACHE_MAX_SIZE,
+    settings.IMAGE_CACHE_TTL
+)
@@ -0,0 +1,233 @@
+"""
+Concurrent image downloads for rendered pages
+"""
+
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.http_client import http_client
+from app.core.process_pool import ProcessPool
+from app.renderer.image_cache import image_cache
+from app.renderer.image_optimizer import (
+    DEFAULT_PROFILE, get_profile, image_pool, needs_optimization, optimize_image
+)
+
+IMAGE_HEADERS = {
+    'User-Agent': settings.USER_AGENT,
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8'
+}
+
+
+class ImageFetcher:
+    """
+    Downloads and optimizes a page's images concurrently
+
+    Images come from the shared image cache when possible, then from the
+    bytes the browser captured while rendering the page; otherwise they are
+    downloaded over the shared connection pool. New images are optimized for
+    the image profile in the image process pool and cached. Each download
+    has its own timeout, at most `per_host` downloads run against one host
+    at a time, and a page gets `page_budget` seconds in total. Images that
+    fail or are still downloading when the budget runs out come back as None
+    so the page can drop them instead of stalling the job. Those downloads
+    keep going for other pages that share them until close() cancels them.
+    """
+
+    def __init__(
+        self,
+        profile: str = DEFAULT_PROFILE,
+        pool: ProcessPool = image_pool,
+        per_host: int = settings.IMAGE_FETCH_PER_HOST,
+        timeout: float = settings.IMAGE_FETCH_TIMEOUT,
+        page_budget: float = settings.IMAGE_PAGE_BUDGET,
+        use_cache: bool = settings.IMAGE_CACHE_ENABLED
+    ):
+        self.profile = profile
+        self.max_width = get_profile(profile)['max_width']
+        self.quality = get_profile(profile)['quality']
+        self.pool = pool
+        self.per_host = per_host
+        self.timeout = timeout
+        self.page_budget = page_budget
+        self.cache = image_cache if use_cache else None
+        self.cache_stats = {'hits': 0, 'misses': 0}  # Image cache counters for this job
+        self.source_stats = {'captured': 0, 'downloaded': 0}  # Where cache misses came from
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def fetch_all(
+        self,
+        urls: Iterable[str],
+        captured: Optional[Dict[str, Dict]] = None
+    ) -> Dict[str, Optional[Tuple[bytes, str]]]:
+        """
+        Get optimized images concurrently within the page budget
+
+        Args:
+            urls: Absolute image URLs (duplicates are fetched once)
+            captured: Image responses recorded by the browser (ImageCapture.images);
+                only URLs missing from it are downloaded
+
+        Returns:
+            Dict of url -> (optimized bytes, content type), or None if the image failed
+        """
+        urls = list(dict.fromkeys(urls))
+        results: Dict[str, Optional[Tuple[bytes, str]]] = {url: None for url in urls}
+        if not urls:
+            return results
+
+        # Pages rendered at the same time share downloads of the same image
+        tasks = {}
+        for url in urls:
+            task = self._inflight.get(url)
+            if task is None:
+                task = asyncio.create_task(self._get(url, captured.get(url) if captured else None))
+                self._inflight[url] = task
+                task.add_done_callback(lambda _, url=url: self._inflight.pop(url, None))
+            tasks[task] = url
+
+        done, pending = await asyncio.wait(tasks, timeout=self.page_budget)
+
+        if pending:
+            print(f"[ImageFetcher] Page image budget of {self.page_budget:.0f}s exhausted, skipping {len(pending)} images")
+
+        for task in done:
+            if task.cancelled():
+                continue
+            if task.exception() is not None:
+                print(f"[ImageFetcher] ✗ Error processing image {tasks[task][:60]}: {task.exception()!r}")
+                continue
+            results[tasks[task]] = task.result()
+        return results
+
+    async def close(self):
+        """Cancel downloads still running, e.g. past a page's budget"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            print(f"[ImageFetcher] Cancelled {len(tasks)} unfinished image downloads")
+
+    async def _get(self, url: str, captured: Optional[Dict] = None) -> Optional[Tuple[bytes, str]]:
+        """One image: cache, browser capture, conditional download or full download"""
+        # Optimized bytes depend on the profile, so it is part of the cache key
+        cache_key = f"{self.profile} {url}"
+        entry = await self.cache.lookup(cache_key) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            cached = await self.cache.load(entry)
+            if cached is not None:
+                self.cache_stats['hits'] += 1
+                return cached
+            entry = None
+
+        if captured is not None:
+            self.cache_stats['misses'] += 1
+            self.source_stats['captured'] += 1
+            return await self._optimize_and_store(
+                url,
+                cache_key,
+                captured['body'],
+                captured['content_type'],
+                captured['etag'],
+                captured['last_modified']
+            )
+
+        headers = dict(IMAGE_HEADERS)
+        if entry:
+            headers.update(self.cache.conditional_headers(entry))
+
+        response = await self._download(url, headers)
+        if response is None:
+            return None
+        status, content, content_type, etag, last_modified = response
+
+        if status == 304 and entry:
+            cached = await self.cache.load(entry)
+            if cached is not None:
+                await self.cache.touch(cache_key, entry)
+                self.cache_stats['hits'] += 1
+                return cached
+            # Blob was evicted meanwhile - fetch it unconditionally
+            response = await self._download(url, dict(IMAGE_HEADERS))
+            if response is None:
+                return None
+            status, content, content_type, etag, last_modified = response
+
+        if status != 200:
+            print(f"[ImageFetcher] ✗ Failed to download image: {url[:60]} (Status: {status})")
+            return None
+
+        self.cache_stats['misses'] += 1
+        self.source_stats['downloaded'] += 1
+        return await self._optimize_and_store(url, cache_key, content, content_type, etag, last_modified)
+
+    async def _optimize_and_store(
+        self,
+        url: str,
+        cache_key: str,
+        content: bytes,
+        content_type: str,
+        etag: Optional[str],
+        last_modified: Optional[str]
+    ) -> Optional[Tuple[bytes, str]]:
+        """Optimize new image bytes in the process pool and cache the result"""
+        if needs_optimization(content, self.max_width):
+            try:
+                content, content_type = await self.pool.run(
+                    optimize_image,
+                    content,
+                    content_type,
+                    url,
+                    self.max_width,
+                    self.quality
+                )
+            except BrokenProcessPool:
+                # The image may be what killed the worker, so it is dropped
+                # rather than embedded unoptimized
+                print(f"[ImageFetcher] ✗ Optimizer process died while handling {url[:60]}, skipping image")
+                return None
+
+        if self.cache:
+            await self.cache.store(cache_key, content, content_type, etag=etag, last_modified=last_modified)
+        return content, content_type
+
+    async def _download(self, url: str, headers: Dict[str, str]) -> Optional[Tuple]:
+        """
+        GET an image under the per-host limit
+
+        Returns:
+            Tuple of (status, body, content type, ETag, Last-Modified), or None on error
+        """
+        host = urlparse(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.per_host)
+            self._host_limits[host] = limit
+
+        async with limit:
+            try:
+                session = http_client.session
+                async with session.get(
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+                    content = await response.read() if response.status == 200 else b''
+                    return (
+                        response.status,
+                        content,
+                        response.headers.get('Content-Type', 'image/png'),
+                        response.headers.get('ETag'),
+                        response.headers.get('Last-Modified')
+                    )
+            except asyncio.TimeoutError:
+                print(f"[ImageFetcher] ✗ Timeout downloading image: {url[:60]}")
+            except aiohttp.ClientError as e:
+                print(f"[ImageFetcher] ✗ Error downloading image {url[:60]}: {str(e)[:100]}")
+            return None
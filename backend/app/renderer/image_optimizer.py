@@ -0,0 +1,103 @@
+"""
+Image optimization for PDF embedding
+"""
+
+import os
+from io import BytesIO
+from typing import Dict, Tuple
+
+from PIL import Image
+
+from app.core.config import settings
+from app.core.process_pool import ProcessPool
+
+DEFAULT_PROFILE = 'standard'
+
+
+def get_profile(name: str) -> Dict[str, int]:
+    """Look up an image profile ('max_width' and 'quality'), falling back to the default"""
+    profile = settings.IMAGE_PROFILES.get(name)
+    if profile is None:
+        print(f"[ImageOptimizer] Unknown image profile '{name}', using '{DEFAULT_PROFILE}'")
+        profile = settings.IMAGE_PROFILES[DEFAULT_PROFILE]
+    return profile
+
+
+def needs_optimization(content: bytes, max_width: int, skip_max_bytes: int = settings.IMAGE_SKIP_MAX_BYTES) -> bool:
+    """
+    Check whether an image has to be decoded and re-encoded
+
+    Small JPEGs that already fit the profile's width are embedded as they
+    are. Only the image header is read, so this is cheap enough to call on
+    the event loop.
+    """
+    if len(content) > skip_max_bytes:
+        return True
+    try:
+        with Image.open(BytesIO(content)) as pil_img:
+            return not (
+                pil_img.format == 'JPEG'
+                and pil_img.mode in ('RGB', 'L')
+                and pil_img.width <= max_width
+            )
+    except Exception:
+        return True
+
+
+def optimize_image(
+    content: bytes,
+    content_type: str,
+    source: str = '',
+    max_width: int = 800,
+    quality: int = 85
+) -> Tuple[bytes, str]:
+    """
+    Downscale and re-encode an image as JPEG for embedding
+
+    Runs in the image process pool, so it must stay a picklable module-level
+    function.
+
+    Args:
+        content: Downloaded image bytes
+        content_type: Content-Type the image was served with
+        source: Image URL, for log messages
+        max_width: Images wider than this are downscaled
+        quality: JPEG quality
+
+    Returns:
+        Tuple of (bytes, content type); the input is returned unchanged if
+        the image can't be decoded
+    """
+    try:
+        pil_img = Image.open(BytesIO(content))
+
+        # Resize if too large
+        if pil_img.width > max_width:
+            ratio = max_width / pil_img.width
+            new_size = (max_width, int(pil_img.height * ratio))
+            pil_img = pil_img.resize(new_size, Image.Resampling.LANCZOS)
+
+        # Convert to RGB if needed
+        if pil_img.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', pil_img.size, (255, 255, 255))
+            if pil_img.mode == 'P':
+                pil_img = pil_img.convert('RGBA')
+            background.paste(pil_img, mask=pil_img.split()[-1] if pil_img.mode in ('RGBA', 'LA') else None)
+            pil_img = background
+        elif pil_img.mode not in ('RGB', 'L'):
+            pil_img = pil_img.convert('RGB')
+
+        # Save optimized image
+        buffer = BytesIO()
+        pil_img.save(buffer, format='JPEG', quality=quality, optimize=True)
+        return buffer.getvalue(), 'image/jpeg'
+    except Exception as e:
+        print(f"[ImageOptimizer] Image optimization failed for {source[:50]}: {e}")
+        return content, content_type
+
+
+# Global process pool for image work
+image_pool = ProcessPool(
+    'ImageOptimizer',
+    max_workers=settings.IMAGE_WORKERS or os.cpu_count() or 1
+)
@@ -0,0 +1,158 @@
+"""
+Page readiness detection based on DOM stability
+"""
+
+import asyncio
+from typing import Dict, List
+
+from playwright.async_api import BrowserContext, Page
+
+from app.core.config import settings
+
+# Tracks when each in-flight fetch/XHR call started; installed before any
+# page script runs. __docforgePending(graceMs) counts the calls started less
+# than graceMs ago, so long-polling, event streams and beacons that stay open
+# for the life of the page are not waited for.
+PENDING_REQUESTS_SCRIPT = """
+(() => {
+    const inFlight = new Map();
+    let nextId = 0;
+    const begin = () => {
+        const id = nextId++;
+        inFlight.set(id, performance.now());
+        return () => { inFlight.delete(id); };
+    };
+    Object.defineProperty(window, '__docforgePending', {
+        value: (graceMs) => {
+            const now = performance.now();
+            let recent = 0;
+            for (const started of inFlight.values()) {
+                if (now - started < graceMs) recent++;
+            }
+            return recent;
+        }
+    });
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function (...args) {
+            const end = begin();
+            return originalFetch.apply(this, args).finally(end);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function (...args) {
+        this.addEventListener('loadend', begin(), { once: true });
+        return originalSend.apply(this, args);
+    };
+})();
+"""
+
+# Resolves once the content root has stopped mutating and has text, and its
+# eager images have loaded and decoded - or the budget runs out. Fetch/XHR
+# calls only hold it up during their first requestGraceMs.
+WAIT_FOR_READY_SCRIPT = """
+async ({ selectors, quietMs, requestGraceMs, budgetMs, waitForImages }) => {
+    const start = performance.now();
+    const deadline = start + budgetMs;
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const findRoot = () => {
+        for (const selector of selectors) {
+            const element = document.querySelector(selector);
+            if (element) return element;
+        }
+        return document.body || document.documentElement;
+    };
+
+    let lastMutation = performance.now();
+    const observer = new MutationObserver((records) => {
+        const root = findRoot();
+        for (const record of records) {
+            if (root.contains(record.target) || record.target.contains(root)) {
+                lastMutation = performance.now();
+                return;
+            }
+        }
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, characterData: true, attributes: true
+    });
+
+    const pendingImages = (root) => Array.from(root.querySelectorAll('img'))
+        .filter((img) => img.loading !== 'lazy' && !img.complete);
+
+    try {
+        while (performance.now() < deadline) {
+            const root = findRoot();
+            const quiet = performance.now() - lastMutation >= quietMs;
+            const hasText = (root.textContent || '').trim().length > 0;
+            const requestsDone = typeof window.__docforgePending !== 'function'
+                || window.__docforgePending(requestGraceMs) === 0;
+            const imagesDone = !waitForImages || pendingImages(root).length === 0;
+
+            if (document.readyState !== 'loading' && quiet && hasText && requestsDone && imagesDone) {
+                if (waitForImages) {
+                    const decodes = Array.from(root.querySelectorAll('img'))
+                        .filter((img) => img.complete && img.naturalWidth > 0)
+                        .map((img) => img.decode().catch(() => {}));
+                    await Promise.race([Promise.all(decodes), sleep(Math.max(0, deadline - performance.now()))]);
+                }
+                return { ready: true, elapsed: performance.now() - start };
+            }
+            await sleep(50);
+        }
+        return { ready: false, elapsed: performance.now() - start };
+    } finally {
+        observer.disconnect();
+    }
+}
+"""
+
+
+async def install_readiness_tracking(context: BrowserContext):
+    """Track in-flight fetch/XHR in every page of the context (before navigation)"""
+    await context.add_init_script(PENDING_REQUESTS_SCRIPT)
+
+
+async def wait_until_ready(
+    page: Page,
+    selectors: List[str],
+    budget: float = settings.RENDER_READY_TIMEOUT,
+    quiet_ms: int = settings.RENDER_DOM_QUIET_MS,
+    request_grace_ms: int = settings.RENDER_REQUEST_GRACE_MS,
+    wait_for_images: bool = True
+) -> Dict:
+    """
+    Wait until the main content is stable instead of for network idle
+
+    Analytics beacons, long-polling and widgets keep a page's network busy
+    long after its content is final. The content root going quiet with text
+    in it is the gate; fetch/XHR calls only delay it while they are younger
+    than `request_grace_ms`, so a connection held open for the life of the
+    page doesn't use up the budget.
+
+    Args:
+        page: Page after navigation (DOMContentLoaded)
+        selectors: CSS selectors tried in order to find the content root
+        budget: Hard limit in seconds; the page is used as-is afterwards
+        quiet_ms: How long the content must go without DOM mutations
+        request_grace_ms: How long an in-flight fetch/XHR holds readiness up
+        wait_for_images: Also wait for eager images to load and decode
+
+    Returns:
+        Dict with 'ready' (False if the budget ran out) and 'elapsed' (ms)
+    """
+    try:
+        return await asyncio.wait_for(
+            page.evaluate(WAIT_FOR_READY_SCRIPT, {
+                'selectors': selectors,
+                'quietMs': quiet_ms,
+                'requestGraceMs': request_grace_ms,
+                'budgetMs': budget * 1000,
+                'waitForImages': wait_for_images
+            }),
+            # The script enforces the budget; this only guards a hung evaluate
+            timeout=budget + 5
+        )
+    except Exception as e:
+        print(f"[Readiness] Readiness check failed, using page as-is: {e}")
+        return {'ready': False, 'elapsed': budget * 1000}
@@ -0,0 +1,78 @@
+"""
+Capture of image bytes the browser downloads while rendering a page
+"""
+
+import asyncio
+from typing import Dict, Set
+
+from playwright.async_api import BrowserContext, Response
+
+from app.core.config import settings
+
+
+class ImageCapture:
+    """
+    Records the bodies of image responses seen by a browser context
+
+    Chromium has already downloaded the page's eager images by the time its
+    HTML is extracted, so their bytes are kept here and embedded directly
+    instead of being downloaded a second time. Responses are recorded under
+    their final URL and every URL they were redirected from, since the
+    rendered HTML references the original one. One capture is attached per
+    leased context.
+    """
+
+    def __init__(self, timeout: float = settings.RENDER_CAPTURE_TIMEOUT):
+        self.timeout = timeout
+        self.images: Dict[str, Dict] = {}  # url -> body, content_type, etag, last_modified
+        self._pending: Set[asyncio.Task] = set()
+
+    def attach(self, context: BrowserContext):
+        """Start recording image responses of the context"""
+        context.on('response', self._on_response)
+
+    async def collect(self) -> Dict[str, Dict]:
+        """
+        Wait briefly for bodies still being read and return what was captured
+
+        Must be called before the context is closed; bodies that aren't
+        available within `timeout` are left for the image fetcher.
+        """
+        if self._pending:
+            _, pending = await asyncio.wait(set(self._pending), timeout=self.timeout)
+            for task in pending:
+                task.cancel()
+        return self.images
+
+    def _on_response(self, response: Response):
+        if response.request.resource_type != 'image' or response.status != 200:
+            return
+        if not response.url.startswith(('http://', 'https://')):
+            return
+
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response: Response):
+        try:
+            body = await response.body()
+        except Exception:
+            # Aborted, evicted from the browser's buffer or the page navigated away
+            return
+        if not body:
+            return
+
+        headers = response.headers
+        image = {
+            'body': body,
+            'content_type': headers.get('content-type', 'image/png'),
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified')
+        }
+
+        request = response.request
+        while request is not None:
+            self.images[request.url] = image
+            request = request.redirected_from
+
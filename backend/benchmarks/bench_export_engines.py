@@ -0,0 +1,121 @@
+"""
+PDF export engine benchmark
+
+Exports the same synthetic, text-only documentation pages with the
+Playwright (Chromium) and WeasyPrint engines and compares wall time, peak
+memory and output size at 10, 100 and 1000 pages. Every export runs in a
+fresh process so peak RSS covers one export only; "browser RSS" is the
+largest single Chromium process. Linux/macOS only (uses `resource`). Run
+from the backend directory:
+
+    python -m benchmarks.bench_export_engines
+"""
+
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SIZES = [10, 100, 1000]
+ENGINES = ["playwright", "weasyprint"]
+
+SECTION = """
+<h2>Configuring the client</h2>
+<p>Pass a <code>timeout</code> to control how long requests may take. The
+<a href="https://docs.example.com/reference/client#timeout">reference</a> lists
+every option and <a href="https://docs.example.com/guides/retries">the retry
+guide</a> explains how backoff between attempts is computed.</p>
+<pre><code>client = Client(timeout=30, retries=3)
+response = client.get("/items", params={"page": 2})</code></pre>
+<table>
+  <tr><th>Option</th><th>Default</th><th>Description</th></tr>
+  <tr><td>timeout</td><td>30</td><td>Seconds before a request is aborted</td></tr>
+  <tr><td>retries</td><td>3</td><td>Attempts for idempotent requests</td></tr>
+</table>
+<ul><li>Connections are pooled per host.</li><li>Responses are streamed on demand.</li></ul>
+"""
+
+
+def make_pages(count: int) -> list:
+    return [
+        {
+            'title': f"Client guide, part {i + 1}",
+            'html': f"<article>{SECTION * 4}</article>",
+            'url': f"https://docs.example.com/guide/{i + 1}",
+            'metadata': {'url': f"https://docs.example.com/guide/{i + 1}"}
+        }
+        for i in range(count)
+    ]
+
+
+def _max_rss_mb(who: int) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+async def _export_playwright(output_dir: str, pages: list) -> str:
+    from app.exporter.playwright_pdf_exporter import PlaywrightPDFExporter
+    from app.renderer.browser_pool import browser_pool
+    from app.renderer.browser_thread import browser_thread
+
+    try:
+        return await PlaywrightPDFExporter(output_dir).export(pages, 'bench.pdf')
+    finally:
+        await browser_pool.close()
+        browser_thread.stop()
+
+
+def run_export(engine: str, count: int) -> dict:
+    """One export in this (fresh) process; returns its measurements"""
+    pages = make_pages(count)
+    output_dir = tempfile.mkdtemp(prefix='docforge-bench-')
+    try:
+        # Keep the exporters' progress output out of the results table
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if engine == 'playwright':
+                pdf_path = asyncio.run(_export_playwright(output_dir, pages))
+            else:
+                from app.exporter.pdf_exporter import export_pdf
+                pdf_path = export_pdf(output_dir, pages, 'bench.pdf')
+            elapsed = time.perf_counter() - start
+
+        return {
+            'seconds': elapsed,
+            'python_rss': _max_rss_mb(resource.RUSAGE_SELF),
+            'browser_rss': _max_rss_mb(resource.RUSAGE_CHILDREN),
+            'size': os.path.getsize(pdf_path)
+        }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def main():
+    spawn = multiprocessing.get_context('spawn')
+    print(f"{'pages':>6} | {'engine':>10} | {'wall s':>8} | {'python RSS MB':>13} | {'browser RSS MB':>14} | {'PDF KB':>9}")
+    print("-" * 76)
+    for count in SIZES:
+        for engine in ENGINES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                try:
+                    result = pool.submit(run_export, engine, count).result()
+                except Exception as e:
+                    print(f"{count:>6} | {engine:>10} | unavailable: {str(e).splitlines()[0][:60]}")
+                    continue
+            browser_rss = f"{result['browser_rss']:>14,.0f}" if engine == 'playwright' else f"{'-':>14}"
+            print(
+                f"{count:>6} | {engine:>10} | {result['seconds']:>8.1f} | {result['python_rss']:>13,.0f} | "
+                f"{browser_rss} | {result['size'] / 1024:>9,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
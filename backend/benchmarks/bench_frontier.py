@@ -0,0 +1,70 @@
+"""
+Frontier enqueue micro-benchmark
+
+Compares the per-link enqueue cost of the old list-based frontier with
+URLFrontier as the frontier grows. Run from the backend directory:
+
+    python -m benchmarks.bench_frontier
+"""
+
+import time
+
+from app.crawler.frontier import URLFrontier
+
+SIZES = [1_000, 10_000, 100_000]
+LIST_MAX_SIZE = 10_000  # The list frontier is quadratic; larger sizes take minutes
+LINKS_PER_PAGE = 50
+
+
+def make_links(count: int) -> list:
+    return [f"https://docs.example.com/page/{i}" for i in range(count)]
+
+
+def bench_list(links: list) -> float:
+    """Old approach: list frontier with a rebuilt membership list per link"""
+    visited = set()
+    queue = []
+    start = time.perf_counter()
+    for link in links:
+        if link not in visited and link not in [item[0] for item in queue]:
+            queue.append((link, 1))
+    return time.perf_counter() - start
+
+
+def bench_frontier(links: list) -> float:
+    """URLFrontier: deque plus indexed seen-set"""
+    frontier = URLFrontier(set())
+    start = time.perf_counter()
+    for link in links:
+        frontier.push(link, 1)
+    return time.perf_counter() - start
+
+
+def bench_frontier_duplicates(links: list) -> float:
+    """URLFrontier re-offered the same links, as on link-dense nav menus"""
+    frontier = URLFrontier(set())
+    for link in links:
+        frontier.push(link, 1)
+    sample = links[-LINKS_PER_PAGE:]
+    start = time.perf_counter()
+    for _ in range(len(links) // LINKS_PER_PAGE):
+        for link in sample:
+            frontier.push(link, 2)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'frontier size':>14} | {'list ns/enqueue':>16} | {'deque ns/enqueue':>17} | {'dup ns/check':>13}")
+    print("-" * 70)
+    for size in SIZES:
+        links = make_links(size)
+        list_cost = "skipped"
+        if size <= LIST_MAX_SIZE:
+            list_cost = f"{bench_list(links) / size * 1e9:,.0f}"
+        frontier_cost = bench_frontier(links) / size * 1e9
+        duplicate_cost = bench_frontier_duplicates(links) / size * 1e9
+        print(f"{size:>14,} | {list_cost:>16} | {frontier_cost:>17,.0f} | {duplicate_cost:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
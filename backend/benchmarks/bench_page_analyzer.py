@@ -0,0 +1,75 @@
+"""
+Crawl-time page analysis benchmark
+
+Compares the old BeautifulSoup html.parser metadata extraction with
+analyze_page on synthetic documentation pages of increasing size. Run from
+the backend directory:
+
+    python -m benchmarks.bench_page_analyzer
+"""
+
+import time
+
+from bs4 import BeautifulSoup
+
+from app.crawler.page_analyzer import analyze_page
+
+SIZES = [10 * 1024, 500 * 1024, 5 * 1024 * 1024]
+ROUNDS = 3
+
+SECTION = """
+<section>
+  <h2>Configuring the client</h2>
+  <p>Pass a <code>timeout</code> to control how long requests may take. The
+  <a href="/docs/reference/client#timeout">reference</a> lists every option and
+  <a href="../guides/retries.html">the retry guide</a> explains backoff.</p>
+  <img src="/static/diagram.png" alt="Request lifecycle">
+  <pre><code>client = Client(timeout=30)</code></pre>
+  <script>window.analytics && analytics.track("section-view");</script>
+</section>
+"""
+
+
+def make_page(size: int) -> str:
+    head = (
+        '<!DOCTYPE html><html><head><title>Client configuration</title>'
+        '<link rel="canonical" href="https://docs.example.com/client">'
+        '<style>body { font-family: sans-serif; }</style></head><body>'
+    )
+    sections = SECTION * max(1, (size - len(head)) // len(SECTION))
+    return head + sections + '</body></html>'
+
+
+def bench_bs4(content: str) -> float:
+    """Old approach: build a full html.parser tree, then walk it several times"""
+    start = time.perf_counter()
+    soup = BeautifulSoup(content, 'html.parser')
+    soup.title.string if soup.title else None
+    len(soup.find_all('img')) > 0
+    len(soup.get_text().split())
+    [a['href'] for a in soup.find_all('a', href=True)]
+    return time.perf_counter() - start
+
+
+def bench_analyzer(content: str) -> float:
+    """analyze_page: one streaming lxml pass, no tree"""
+    start = time.perf_counter()
+    analyze_page(content)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'page size':>10} | {'bs4 ms':>9} | {'analyzer ms':>12} | {'speedup':>8}")
+    print("-" * 48)
+    for size in SIZES:
+        content = make_page(size)
+        bs4_time = min(bench_bs4(content) for _ in range(ROUNDS))
+        analyzer_time = min(bench_analyzer(content) for _ in range(ROUNDS))
+        print(
+            f"{size // 1024:>8}KB | {bs4_time * 1000:>9,.1f} | {analyzer_time * 1000:>12,.1f} | "
+            f"{bs4_time / analyzer_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
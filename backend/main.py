@@ -19,6 +19,11 @@ from dotenv import load_dotenv
 
 from app.api import analyzer, crawler, exporter
 from app.core.config import settings
+from app.core.http_client import http_client
+from app.renderer.browser_pool import browser_pool
+from app.renderer.browser_thread import browser_thread
+from app.exporter.pdf_exporter import weasyprint_pool
+from app.renderer.image_optimizer import image_pool
 
 load_dotenv()
 
@@ -36,10 +41,24 @@ async def lifespan(app: FastAPI):
     # Ensure export directory exists
     os.makedirs(settings.EXPORT_DIR, exist_ok=True)
     
+    # Open the shared HTTP connection pool
+    await http_client.start()
+    
+    # Launch the warm browser pool shared by renderers and exporters
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"⚠ Browser pool could not start, browsers will launch on first use: {e}")
+    
     yield
     
     # Shutdown
     print("👋 DocForge API shutting down...")
+    await http_client.close()
+    await browser_pool.close()
+    browser_thread.stop()
+    image_pool.shutdown()
+    weasyprint_pool.shutdown()
 
 
 app = FastAPI(
@@ -80,7 +99,8 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "service": "docforge-backend"
+        "service": "docforge-backend",
+        "browser_pool": browser_pool.stats()
     }
 
 
@@ -0,0 +1,45 @@
+"""
+Tests for the recursive crawler's breadth-first depth handling
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.models import CrawlConfig, PageInfo
+from app.crawler.recursive_crawler import RecursiveCrawler
+
+ROOT = 'https://example.com/'
+
+# root -> A (slow), root -> B, B -> C, C -> X, A -> X, X -> Y
+# X is at depth 2 through A, so Y (depth 3) is within max_depth=3. Through
+# B and C, X would be at depth 3 and Y out of reach.
+LINKS = {
+    '': ['a', 'b'],
+    'a': ['x'],
+    'b': ['c'],
+    'c': ['x'],
+    'x': ['y'],
+    'y': [],
+}
+
+
+class GraphCrawler(RecursiveCrawler):
+    """Recursive crawler over the in-memory LINKS graph"""
+
+    async def _fetch_page(self, url: str) -> tuple:
+        path = url[len(ROOT):]
+        await asyncio.sleep(0.5 if path == 'a' else 0)
+        page_info = PageInfo(url=url, size=0, has_images=False, status="success")
+        return page_info, [ROOT + link for link in LINKS[path]]
+
+
+async def crawl(concurrency: int) -> set:
+    config = CrawlConfig(max_depth=3, concurrency=concurrency, request_delay=0.1)
+    crawler = GraphCrawler(config, 'DocForge-Test')
+    return {page.url[len(ROOT):] async for page in crawler.crawl(ROOT)}
+
+
+@pytest.mark.parametrize('concurrency', [1, 4])
+def test_pages_do_not_depend_on_fetch_timing(concurrency):
+    assert asyncio.run(crawl(concurrency)) == set(LINKS)
@@ -0,0 +1,74 @@
+"""
+Tests for sitemap parsing and expansion order
+"""
+
+import asyncio
+import gzip
+
+from app.crawler import sitemap_parser
+from app.crawler.sitemap_parser import (
+    SITEMAP_ENTRY, URL_ENTRY, SitemapStreamParser, expand_sitemap
+)
+
+URLSET = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    b'<url><loc>https://example.com/a</loc></url>'
+    b'<url><loc>https://example.com/b</loc></url>'
+    b'</urlset>'
+)
+INDEX = 'https://example.com/sitemap.xml'
+CHILDREN = [f'https://example.com/sitemap-{i}.xml' for i in range(3)]
+
+
+def parse_bytewise(body: bytes) -> list:
+    parser = SitemapStreamParser()
+    entries = []
+    for i in range(len(body)):
+        entries += parser.feed(body[i:i + 1])
+    return entries + parser.close()
+
+
+def test_gzipped_sitemap_fed_one_byte_at_a_time():
+    assert parse_bytewise(gzip.compress(URLSET)) == [
+        (URL_ENTRY, 'https://example.com/a'),
+        (URL_ENTRY, 'https://example.com/b'),
+    ]
+
+
+def test_plain_sitemap_fed_one_byte_at_a_time():
+    assert parse_bytewise(URLSET) == parse_bytewise(gzip.compress(URLSET))
+
+
+async def fake_stream_sitemap(sitemap_url, user_agent, timeout=None):
+    """Index of three child sitemaps with two URLs each; child 0 answers last"""
+    if sitemap_url == INDEX:
+        for child in CHILDREN:
+            yield SITEMAP_ENTRY, child
+        return
+
+    child = CHILDREN.index(sitemap_url)
+    await asyncio.sleep(0.05 if child == 0 else 0)
+    for n in range(2):
+        yield URL_ENTRY, f'{child}/{n}'
+
+
+async def expand(**kwargs) -> list:
+    return [url async for url in expand_sitemap(INDEX, 'DocForge-Test', **kwargs)]
+
+
+def test_ordered_expansion_follows_the_index(monkeypatch):
+    monkeypatch.setattr(sitemap_parser, 'stream_sitemap', fake_stream_sitemap)
+    assert asyncio.run(expand(ordered=True)) == ['0/0', '0/1', '1/0', '1/1', '2/0', '2/1']
+
+
+def test_ordered_expansion_keeps_the_first_urls(monkeypatch):
+    monkeypatch.setattr(sitemap_parser, 'stream_sitemap', fake_stream_sitemap)
+    assert asyncio.run(expand(ordered=True, max_urls=3)) == ['0/0', '0/1', '1/0']
+
+
+def test_unordered_expansion_follows_completion(monkeypatch):
+    monkeypatch.setattr(sitemap_parser, 'stream_sitemap', fake_stream_sitemap)
+    urls = asyncio.run(expand())
+    assert sorted(urls) == ['0/0', '0/1', '1/0', '1/1', '2/0', '2/1']
+    assert urls[-2:] == ['0/0', '0/1']
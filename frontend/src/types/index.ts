@@ -41,6 +41,10 @@ export interface CrawlConfig {
   respect_canonical: boolean;
   exclude_patterns: string[];
   request_delay: number;
+  concurrency?: number;
+  preserve_order?: boolean;
+  image_profile?: 'draft' | 'standard' | 'high';
+  pdf_engine?: 'playwright' | 'weasyprint';
 }
 
 export interface CrawlRequest {
@@ -74,6 +78,8 @@ export interface JobStatusResponse {
   pages_processed: number;
   pages: PageInfo[];
   logs: string[];  // Activity logs
+  http_cache?: { hits: number; misses: number };  // Crawl cache counters
+  pdf_bytes_written?: number;  // PDF bytes written so far during export
   error?: string;
   created_at: string;
   completed_at?: string;